@@ -1,9 +1,12 @@
 import streamlit as st
-import pandas as pd
 import json
-import plotly.express as px
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from crosslingual import LANGUAGES, Response, load_responses, model_name, response_path
+from crosslingual.store import read_table
+
 # --- Configuration ---
 st.set_page_config(
     page_title="Cross-Lingual LLM Bias Explorer",
@@ -19,25 +22,28 @@ def load_data():
     with open(questions_path, "r") as f:
         questions = json.load(f)
     
-    # Load responses for available models
+    # Only the file headers are read up front; answers are streamed on demand
     models = ["llama3-8b", "llama3-70b", "jais-30b"]
-    responses = {}
+    model_names = {}
     for model in models:
-        path = Path(f"results/responses/{model}_responses.json")
-        if path.exists():
-            with open(path, "r") as f:
-                responses[model] = json.load(f)
+        if response_path(model).exists():
+            model_names[model] = model_name(model)
     
     # Load analysis summary
-    analysis_path = Path("results/analysis_summary.csv")
-    if analysis_path.exists():
-        analysis_df = pd.read_csv(analysis_path)
-    else:
-        analysis_df = pd.DataFrame()
+    analysis_df = read_table("analysis_summary", Path("results/analysis_summary.csv"))
+
+    return questions, model_names, analysis_df
 
-    return questions, responses, analysis_df
 
-questions, responses, analysis_df = load_data()
+@st.cache_data
+def load_question_responses(model: str, question_id: int) -> dict[str, Response]:
+    """One model's answers to one question, keyed by language (first sample)."""
+    by_language = {}
+    for record in load_responses(model, question_ids=[question_id]):
+        by_language.setdefault(record.language, record)
+    return by_language
+
+questions, model_names, analysis_df = load_data()
 
 # --- Sidebar ---
 with st.sidebar:
@@ -50,9 +56,9 @@ with st.sidebar:
     
     selected_model = st.selectbox(
         "Select Model to Analyze",
-        options=list(responses.keys()),
+        options=list(model_names.keys()),
         index=1, # Default to 70b
-        format_func=lambda x: responses[x]["model"]
+        format_func=lambda x: model_names[x]
     )
 
     st.divider()
@@ -60,7 +66,7 @@ with st.sidebar:
 
 # --- Main Page ---
 
-st.header(f"Analyzing: {responses[selected_model]['model']}")
+st.header(f"Analyzing: {model_names[selected_model]}")
 
 # Tabs for different views
 tab1, tab2, tab3 = st.tabs(["🔍 Interactive Probe", "📊 Visualizations", "📝 Methodology & Critique"])
@@ -98,24 +104,20 @@ with tab1:
     
     # Columns for languages
     cols = st.columns(4)
-    languages = ["en", "ru", "zh", "kz"]
+    languages = LANGUAGES
     flags = {"en": "🇬🇧", "ru": "🇷🇺", "zh": "🇨🇳", "kz": "🇰🇿"}
     
-    model_responses = responses[selected_model]["responses"]
+    model_responses = load_question_responses(selected_model, selected_q_id)
     
     for idx, lang in enumerate(languages):
         with cols[idx]:
             st.markdown(f"### {flags[lang]} {lang.upper()}")
             
-            # Find the answer
-            ans = next(
-                (r for r in model_responses if r["question_id"] == selected_q_id and r["language"] == lang),
-                None
-            )
+            ans = model_responses.get(lang)
             
             if ans:
-                st.info(ans["question"])
-                st.write(ans["answer"])
+                st.info(ans.question)
+                st.write(ans.answer)
                 
                 if not analysis_df.empty:
                     lang_stat = q_stats[q_stats["language"] == lang]
@@ -123,6 +125,11 @@ with tab1:
                         wc = lang_stat.iloc[0]["answer_length_words"]
                         conf = lang_stat.iloc[0]["confidence_score"]
                         st.caption(f"Length: {wc} words | Confidence: {conf:.2f}")
+                if ans.ttft_seconds is not None:
+                    st.caption(
+                        f"TTFT: {ans.ttft_seconds:.2f}s | "
+                        f"Throughput: {ans.tokens_per_second or 0:.1f} tok/s"
+                    )
             else:
                 st.warning("No response found.")
 
@@ -153,6 +160,20 @@ with tab2:
     st.write("Do the answers actually mean the same thing?")
     show_plot(f"similarity_heatmap_{selected_model}.png", "Semantic Similarity Heatmap")
 
+    # Streaming metrics exist only for runs made with query_llms.py --stream
+    if "ttft_seconds" in analysis_df.columns:
+        perf_df = analysis_df[
+            (analysis_df["model"] == selected_model) & analysis_df["ttft_seconds"].notna()
+        ]
+        if not perf_df.empty:
+            st.markdown("### Latency & Throughput")
+            st.write("Is the model slower to start, or to generate, in some languages?")
+            st.dataframe(
+                perf_df.groupby("language_name", observed=True)[
+                    ["ttft_seconds", "tokens_per_second", "itl_p50_ms", "itl_p90_ms", "itl_p99_ms"]
+                ].median().round(2)
+            )
+
 with tab3:
     st.markdown("""
     ## Research Methodology
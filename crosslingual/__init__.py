@@ -0,0 +1,28 @@
+"""
+Shared data layer for the cross-lingual study: the response schema, the
+loader used by every script and the app, and the storage modules
+(`crosslingual.reader`, `crosslingual.journal`, `crosslingual.store`).
+"""
+
+from .loader import (
+    RESPONSES_DIR,
+    discover_models,
+    iter_records,
+    load_responses,
+    model_name,
+    response_path,
+)
+from .schema import CATEGORIES, LANG_NAMES, LANGUAGES, Response
+
+__all__ = [
+    "CATEGORIES",
+    "LANGUAGES",
+    "LANG_NAMES",
+    "RESPONSES_DIR",
+    "Response",
+    "discover_models",
+    "iter_records",
+    "load_responses",
+    "model_name",
+    "response_path",
+]
@@ -0,0 +1,293 @@
+"""
+Response Database
+==================
+Optional SQLite store for model responses and their metrics.
+
+Rows are keyed by (model, question_id, language, sample_index), so the
+lookups every script and the app make are index seeks instead of file
+scans, and a second index on (category, model) serves category filters.
+Once the database exists it is the system of record: query_llms.py
+writes every successful response into it as soon as it is journaled, so
+readers see a run's answers while it is still going. When the run is
+compacted, the model's rows are replaced in a single transaction by the
+compacted set, right after the `<model>_responses.json` export is written;
+that export is kept for compatibility and for committing. The export's
+mtime is recorded with the rows: if a JSON file changes behind the
+database's back (e.g. parse_manual.py), the loader reads the JSON until
+the database is refreshed.
+
+Only the writer that creates the database sets up its schema; every other
+open just connects.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .reader import iter_responses, read_header
+from .schema import ITL_PERCENTILES, Response
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DB_PATH = ROOT_DIR / "results" / "responses" / "responses.sqlite"
+
+# Entry fields with a column of their own; anything else is kept in `extra`
+COLUMNS = (
+    "category", "question", "answer", "error", "latency_seconds",
+    "prompt_tokens", "completion_tokens", "total_tokens",
+    "ttft_seconds", "tokens_per_second", "itl_p50_ms", "itl_p90_ms", "itl_p99_ms",
+)
+KEY_COLUMNS = ("model", "question_id", "language", "sample_index")
+ENTRY_FIELDS = {
+    "question_id", "category", "language", "sample_index", "question", "answer",
+    "usage", "latency_seconds", "error", "ttft_seconds", "tokens_per_second", "itl_ms",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS models (
+    model TEXT PRIMARY KEY,
+    header TEXT NOT NULL,
+    export_mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS responses (
+    model TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    sample_index INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    category TEXT,
+    question TEXT,
+    answer TEXT,
+    error TEXT,
+    latency_seconds REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    total_tokens INTEGER,
+    ttft_seconds REAL,
+    tokens_per_second REAL,
+    itl_p50_ms REAL,
+    itl_p90_ms REAL,
+    itl_p99_ms REAL,
+    extra TEXT,
+    PRIMARY KEY (model, question_id, language, sample_index)
+);
+CREATE INDEX IF NOT EXISTS idx_responses_category ON responses (category, model);
+"""
+
+
+def _row_values(model_key: str, seq: int, entry: dict) -> tuple:
+    usage = entry.get("usage") or {}
+    itl = entry.get("itl_ms") or {}
+    extra = {k: v for k, v in entry.items() if k not in ENTRY_FIELDS}
+    return (
+        model_key, entry["question_id"], entry["language"], entry.get("sample_index", 0), seq,
+        entry.get("category"), entry.get("question"), entry.get("answer"), entry.get("error"),
+        entry.get("latency_seconds"),
+        usage.get("prompt_tokens"), usage.get("completion_tokens"), usage.get("total_tokens"),
+        entry.get("ttft_seconds"), entry.get("tokens_per_second"),
+        *(itl.get(p) for p in ITL_PERCENTILES),
+        json.dumps(extra, ensure_ascii=False) if extra else None,
+    )
+
+
+def _record(row: sqlite3.Row) -> Response:
+    itl = (row["itl_p50_ms"], row["itl_p90_ms"], row["itl_p99_ms"])
+    return Response(
+        model=row["model"],
+        question_id=row["question_id"],
+        language=row["language"],
+        category=row["category"] or "",
+        question=row["question"] or "",
+        answer=row["answer"] or "",
+        sample_index=row["sample_index"],
+        error=row["error"],
+        latency_seconds=row["latency_seconds"],
+        prompt_tokens=row["prompt_tokens"],
+        completion_tokens=row["completion_tokens"],
+        total_tokens=row["total_tokens"],
+        ttft_seconds=row["ttft_seconds"],
+        tokens_per_second=row["tokens_per_second"],
+        itl=itl if any(v is not None for v in itl) else None,
+    )
+
+
+def _entry(row: sqlite3.Row) -> dict:
+    usage = {
+        name: row[name]
+        for name in ("prompt_tokens", "completion_tokens", "total_tokens")
+        if row[name] is not None
+    }
+    entry = {
+        "question_id": row["question_id"],
+        "category": row["category"],
+        "language": row["language"],
+        "sample_index": row["sample_index"],
+        "question": row["question"],
+        "answer": row["answer"],
+        "usage": usage,
+        "latency_seconds": row["latency_seconds"],
+        "error": row["error"],
+    }
+    for field in ("ttft_seconds", "tokens_per_second"):
+        if row[field] is not None:
+            entry[field] = row[field]
+    itl = {p: row[f"itl_{p}_ms"] for p in ITL_PERCENTILES}
+    if any(value is not None for value in itl.values()):
+        entry["itl_ms"] = itl
+    if row["extra"]:
+        entry.update(json.loads(row["extra"]))
+    return entry
+
+
+class ResponseDB:
+    """Thread-safe SQLite database of response entries, one row per sample."""
+
+    def __init__(self, path: Path | None = None, create: bool = True):
+        """Open the database at `path`; with `create`, make it and its schema if needed."""
+        self.path = Path(path or DB_PATH)
+        if create:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if create:
+            # WAL mode is stored in the file, so later opens inherit it
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def __enter__(self) -> "ResponseDB":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def models(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT model FROM models ORDER BY model").fetchall()
+        return [row["model"] for row in rows]
+
+    def header(self, model_key: str) -> dict:
+        """File-level fields (model, model_id, provider, ...) stored for a model."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT header FROM models WHERE model = ?", (model_key,)
+            ).fetchone()
+        return json.loads(row["header"]) if row else {}
+
+    def is_current(self, model_key: str, export_path: Path) -> bool:
+        """True if the model is stored and its JSON export has not changed since."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT export_mtime_ns FROM models WHERE model = ?", (model_key,)
+            ).fetchone()
+        if row is None:
+            return False
+        if not export_path.exists():
+            return True
+        return row["export_mtime_ns"] == export_path.stat().st_mtime_ns
+
+    def replace_model(
+        self, model_key: str, header: dict, entries: Iterable[dict], export_path: Path | None = None
+    ) -> int:
+        """Atomically replace all of a model's rows; returns the number stored."""
+        header = {k: v for k, v in header.items() if k != "responses"}
+        mtime_ns = export_path.stat().st_mtime_ns if export_path and export_path.exists() else None
+        placeholders = ", ".join("?" * (len(KEY_COLUMNS) + 1 + len(COLUMNS) + 1))
+        rows = (_row_values(model_key, seq, entry) for seq, entry in enumerate(entries))
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE model = ?", (model_key,))
+            count = self._conn.executemany(
+                f"INSERT OR REPLACE INTO responses VALUES ({placeholders})", rows
+            ).rowcount
+            self._conn.execute(
+                "INSERT OR REPLACE INTO models (model, header, export_mtime_ns) VALUES (?, ?, ?)",
+                (model_key, json.dumps(header, ensure_ascii=False), mtime_ns),
+            )
+        return count
+
+    def upsert_responses(self, model_key: str, header: dict, entries: Iterable[dict]) -> int:
+        """
+        Store responses as they arrive, replacing any row with the same key.
+        They are ordered after the model's existing rows until the next
+        replace_model(). Returns the number stored.
+        """
+        header = {k: v for k, v in header.items() if k != "responses"}
+        placeholders = ", ".join("?" * (len(KEY_COLUMNS) + 1 + len(COLUMNS) + 1))
+        with self._lock, self._conn:
+            # A model first seen here has no export yet to be current with
+            self._conn.execute(
+                "INSERT OR IGNORE INTO models (model, header, export_mtime_ns) VALUES (?, ?, NULL)",
+                (model_key, json.dumps(header, ensure_ascii=False)),
+            )
+            start = self._conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM responses WHERE model = ?", (model_key,)
+            ).fetchone()[0]
+            rows = [
+                _row_values(model_key, seq, entry)
+                for seq, entry in enumerate(entries, start)
+            ]
+            self._conn.executemany(f"INSERT OR REPLACE INTO responses VALUES ({placeholders})", rows)
+        return len(rows)
+
+    def import_exports(self, responses_dir: Path) -> list[str]:
+        """Load every `<model>_responses.json` the database is not current with."""
+        imported = []
+        for path in sorted(Path(responses_dir).glob("*_responses.json")):
+            model_key = path.stem.replace("_responses", "")
+            if not self.is_current(model_key, path):
+                self.replace_model(model_key, read_header(path), iter_responses(path), path)
+                imported.append(model_key)
+        return imported
+
+    def _select(
+        self,
+        model_key: str,
+        question_ids: Iterable[int] | None,
+        languages: Iterable[str] | None,
+        categories: Iterable[str] | None,
+        include_errors: bool,
+    ) -> list[sqlite3.Row]:
+        clauses = ["model = ?"]
+        params = [model_key]
+        for column, values in (
+            ("question_id", question_ids), ("language", languages), ("category", categories)
+        ):
+            if values is not None:
+                values = list(values)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if not include_errors:
+            clauses.append("error IS NULL")
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT * FROM responses WHERE {' AND '.join(clauses)} ORDER BY seq", params
+            ).fetchall()
+
+    def iter_records(
+        self,
+        model_key: str,
+        question_ids: Iterable[int] | None = None,
+        languages: Iterable[str] | None = None,
+        categories: Iterable[str] | None = None,
+        include_errors: bool = True,
+    ) -> Iterator[Response]:
+        """A model's matching rows as Response records, in export order."""
+        for row in self._select(model_key, question_ids, languages, categories, include_errors):
+            yield _record(row)
+
+    def iter_entries(self, model_key: str, include_errors: bool = True) -> Iterator[dict]:
+        """A model's rows in the `<model>_responses.json` entry layout, in export order."""
+        for row in self._select(model_key, None, None, None, include_errors):
+            yield _entry(row)
+
+
+def open_database(path: Path | None = None) -> ResponseDB | None:
+    """Open the response database if one has been created, else None."""
+    path = Path(path or DB_PATH)
+    return ResponseDB(path, create=False) if path.exists() else None
@@ -0,0 +1,107 @@
+"""
+Response Journal
+=================
+Append-only JSONL write-ahead journal for query results.
+
+Each completed query is appended as one JSON line and fsync'd before the
+call returns, so a crash loses at most the line being written; that torn
+line is cut off before the next append. The journal is replayed on resume
+and compacted into the regular `<model>_responses.json` document at the
+end of a run.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class ResponseJournal:
+    """Durable, thread-safe JSONL journal for one model."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def append(self, entry: dict):
+        """Append one entry and force it to disk."""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._drop_torn_tail()
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _drop_torn_tail(self):
+        """
+        Cut a partial last line left by a crash, so the next entry starts on
+        a line of its own instead of being glued onto the fragment.
+        """
+        if not self.path.exists():
+            return
+        with open(self.path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            # Scan back in blocks for the last complete line
+            end = size
+            while end > 0:
+                start = max(0, end - 65536)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    break
+                end = start
+            else:
+                f.truncate(0)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self) -> list[dict]:
+        """Read back all complete entries, ignoring a torn final line."""
+        if not self.path.exists():
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partially written line from a crash
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """Close and delete the journal once its entries are compacted."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+def write_json_atomic(path: Path, data: dict, indent: int | None = 2):
+    """Write JSON to a temp file, fsync it, then atomically replace `path`."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,30 @@
+"""
+Lazy Imports
+=============
+Module stand-ins for heavy dependencies (numpy, pandas, matplotlib, ...)
+that import the real module on first attribute access. Scripts bind them
+at the top like a normal import, so `--help`, `--dry-run` and other runs
+that never touch a dependency do not pay for loading it.
+
+Annotations such as `pd.DataFrame` are attribute accesses too, so modules
+using these stand-ins start with `from __future__ import annotations`.
+"""
+
+import importlib
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Placeholder for module `name`; becomes a copy of it on first use."""
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__name__)
+        # Copy the real namespace in, so later lookups never reach __getattr__
+        self.__dict__.update(vars(module))
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Module `name`, imported on first attribute access (at once if already loaded)."""
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,87 @@
+"""
+Response Loader
+================
+One API for finding model responses and reading them as Response records.
+
+When the SQLite response database exists and is current for a model,
+records come from indexed queries on it; otherwise the model's JSON file
+is streamed through the reader. Either way filters apply before a record
+is ever built.
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from . import database
+from .reader import iter_responses, read_header
+from .schema import Response
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+RESPONSES_DIR = ROOT_DIR / "results" / "responses"
+
+
+def response_path(model_key: str, responses_dir: Path | None = None) -> Path:
+    """Path of a model's `<model>_responses.json` file."""
+    return (responses_dir or RESPONSES_DIR) / f"{model_key}_responses.json"
+
+
+def discover_models(responses_dir: Path | None = None) -> list[str]:
+    """Keys of all models with a response file or database rows, sorted."""
+    responses_dir = responses_dir or RESPONSES_DIR
+    models = set()
+    if responses_dir.exists():
+        models.update(
+            path.stem.replace("_responses", "")
+            for path in responses_dir.glob("*_responses.json")
+        )
+    db = database.open_database()
+    if db is not None:
+        with db:
+            models.update(db.models())
+    return sorted(models)
+
+
+def model_name(model_key: str, responses_dir: Path | None = None) -> str:
+    """Display name recorded in a model's response file (falls back to the key)."""
+    path = response_path(model_key, responses_dir)
+    db = database.open_database()
+    if db is not None:
+        with db:
+            if db.is_current(model_key, path):
+                return db.header(model_key).get("model", model_key)
+    if not path.exists():
+        return model_key
+    return read_header(path).get("model", model_key)
+
+
+def iter_records(
+    model_key: str,
+    question_ids: Iterable[int] | None = None,
+    languages: Iterable[str] | None = None,
+    categories: Iterable[str] | None = None,
+    include_errors: bool = True,
+    responses_dir: Path | None = None,
+) -> Iterator[Response]:
+    """Stream a model's responses as records; yields nothing if it has none."""
+    filters = {
+        "question_ids": question_ids,
+        "languages": languages,
+        "categories": categories,
+        "include_errors": include_errors,
+    }
+    path = response_path(model_key, responses_dir)
+    db = database.open_database()
+    if db is not None:
+        with db:
+            if db.is_current(model_key, path):
+                yield from db.iter_records(model_key, **filters)
+                return
+    if not path.exists():
+        return
+    for entry in iter_responses(path, **filters):
+        yield Response.from_entry(entry, model_key)
+
+
+def load_responses(model_key: str, **filters) -> list[Response]:
+    """All of a model's responses matching `filters` (see iter_records)."""
+    return list(iter_records(model_key, **filters))
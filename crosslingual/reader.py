@@ -0,0 +1,194 @@
+"""
+Streaming Response Reader
+==========================
+Yields response entries one at a time from `<model>_responses.json`
+documents (or JSONL journals) without loading the whole file.
+
+The JSON document is read in fixed-size chunks and each element of the
+top-level "responses" array is decoded on its own with
+JSONDecoder.raw_decode, so peak memory is one chunk plus one entry no
+matter how many responses a model has. Filters (question id, language,
+category, errors) are applied inside the reader, so callers never hold
+entries they are going to discard.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# Characters read per refill; entries larger than this just take a few refills
+CHUNK_SIZE = 1 << 16
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class _JsonStream:
+    """Minimal pull parser over a text file for walking one top-level object."""
+
+    def __init__(self, f):
+        self._file = f
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the unread part of the buffer."""
+        if self._eof:
+            return False
+        chunk = self._file.read(CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input)."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf) or not self._fill():
+                return self._buf[self._pos:self._pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in response file, found {found!r}")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next JSON value, refilling until it is complete."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut at the buffer edge ("2" of "2.5") decodes early; it is
+            # only complete once followed by a delimiter or the end of input
+            if (end == len(self._buf) or self._buf[end] in _NUMBER_CHARS) and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+    def skip_separator(self) -> bool:
+        """Consume ',' between items; False when the container closes instead."""
+        char = self.peek()
+        if char == ",":
+            self._pos += 1
+            return True
+        self._pos += 1  # '}' or ']'
+        return False
+
+
+def _walk(stream: _JsonStream, stop_at_responses: bool) -> Iterator[tuple[str, object]]:
+    """
+    Walk the top-level object, yielding (key, value) for header fields and
+    ("responses", entry) for each element of the responses array.
+    """
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key == "responses" and stream.peek() == "[":
+            if stop_at_responses:
+                return
+            stream.expect("[")
+            if stream.peek() == "]":
+                stream.expect("]")
+            else:
+                while True:
+                    yield "responses", stream.value()
+                    if not stream.skip_separator():
+                        break
+        else:
+            yield key, stream.value()
+        if not stream.skip_separator():
+            return
+
+
+def _iter_jsonl(path: Path) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # torn final line of a journal
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def read_header(path: Path) -> dict:
+    """
+    Return the top-level fields (model, model_id, provider, ...) of a
+    response document, reading no further than the start of "responses".
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return dict(_walk(_JsonStream(f), stop_at_responses=True))
+
+
+def _as_set(values: Iterable | None) -> set | None:
+    return None if values is None else set(values)
+
+
+def iter_responses(
+    path: Path,
+    question_ids: Iterable[int] | None = None,
+    languages: Iterable[str] | None = None,
+    categories: Iterable[str] | None = None,
+    include_errors: bool = True,
+) -> Iterator[dict]:
+    """
+    Lazily yield the response entries of a `.json` document or `.jsonl`
+    journal, keeping only those that match every given filter.
+    """
+    path = Path(path)
+    question_ids = _as_set(question_ids)
+    languages = _as_set(languages)
+    categories = _as_set(categories)
+
+    def keep(entry: dict) -> bool:
+        return (
+            (include_errors or not entry.get("error"))
+            and (question_ids is None or entry.get("question_id") in question_ids)
+            and (languages is None or entry.get("language") in languages)
+            and (categories is None or entry.get("category") in categories)
+        )
+
+    if path.suffix == ".jsonl":
+        yield from (entry for entry in _iter_jsonl(path) if keep(entry))
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for key, value in _walk(_JsonStream(f), stop_at_responses=False):
+            if key == "responses" and keep(value):
+                yield value
+
+
+def iter_model_responses(
+    responses_dir: Path,
+    models: Iterable[str] | None = None,
+    **filters,
+) -> Iterator[tuple[str, dict]]:
+    """
+    Yield (model_key, entry) across `<model>_responses.json` files in a
+    directory; `models` limits which files are opened at all.
+    """
+    models = _as_set(models)
+    for path in sorted(Path(responses_dir).glob("*_responses.json")):
+        model_key = path.stem.replace("_responses", "")
+        if models is not None and model_key not in models:
+            continue
+        for entry in iter_responses(path, **filters):
+            yield model_key, entry
@@ -0,0 +1,177 @@
+"""
+Response Schema
+================
+The single in-memory representation of a model response, shared by the
+analysis scripts and the app.
+
+A Response keeps its fields in __slots__ instead of a per-entry dict.
+Language and category are stored as small integer codes into shared
+codebooks, and question texts (identical across models and samples) are
+interned, so loading many models keeps one copy of each string.
+"""
+
+import sys
+import threading
+
+LANGUAGES = ["en", "ru", "zh", "kz"]
+LANG_NAMES = {"en": "English", "ru": "Russian", "zh": "Chinese", "kz": "Kazakh"}
+CATEGORIES = ["factual", "opinion", "commonsense"]
+
+# Streaming inter-token latency percentiles, in the order stored on a Response
+ITL_PERCENTILES = ("p50", "p90", "p99")
+
+
+class Codebook:
+    """Maps a small vocabulary of strings to stable integer codes."""
+
+    def __init__(self, values: list[str]):
+        self._values = list(values)
+        self._codes = {value: code for code, value in enumerate(self._values)}
+        self._lock = threading.Lock()
+
+    def encode(self, value: str) -> int:
+        """Code for `value`, adding it to the vocabulary if unseen."""
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._values)
+                    self._values.append(value)
+                    self._codes[value] = code
+        return code
+
+    def decode(self, code: int) -> str:
+        return self._values[code]
+
+
+LANGUAGE_CODES = Codebook(LANGUAGES)
+CATEGORY_CODES = Codebook(CATEGORIES)
+
+
+class Response:
+    """One answer of one model to one (question, language, sample)."""
+
+    __slots__ = (
+        "model", "question_id", "language_code", "category_code", "sample_index",
+        "question", "answer", "error", "latency_seconds",
+        "prompt_tokens", "completion_tokens", "total_tokens",
+        "ttft_seconds", "tokens_per_second", "itl",
+    )
+
+    def __init__(
+        self,
+        model: str,
+        question_id: int,
+        language: str,
+        category: str,
+        question: str = "",
+        answer: str = "",
+        sample_index: int = 0,
+        error: str | None = None,
+        latency_seconds: float | None = None,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        total_tokens: int | None = None,
+        ttft_seconds: float | None = None,
+        tokens_per_second: float | None = None,
+        itl: tuple | None = None,
+    ):
+        self.model = sys.intern(model)
+        self.question_id = question_id
+        self.language_code = LANGUAGE_CODES.encode(language)
+        self.category_code = CATEGORY_CODES.encode(category)
+        self.sample_index = sample_index
+        self.question = sys.intern(question)
+        self.answer = answer
+        self.error = error
+        self.latency_seconds = latency_seconds
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = total_tokens
+        self.ttft_seconds = ttft_seconds
+        self.tokens_per_second = tokens_per_second
+        self.itl = itl
+
+    @classmethod
+    def from_entry(cls, entry: dict, model: str = "") -> "Response":
+        """Build a record from one entry of a `<model>_responses.json` file."""
+        usage = entry.get("usage") or {}
+        itl = entry.get("itl_ms")
+        return cls(
+            model=model,
+            question_id=entry["question_id"],
+            language=entry.get("language", "en"),
+            category=entry.get("category", ""),
+            question=entry.get("question") or "",
+            answer=entry.get("answer") or "",
+            sample_index=entry.get("sample_index", 0),
+            error=entry.get("error"),
+            latency_seconds=entry.get("latency_seconds"),
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            total_tokens=usage.get("total_tokens"),
+            ttft_seconds=entry.get("ttft_seconds"),
+            tokens_per_second=entry.get("tokens_per_second"),
+            itl=tuple(itl.get(p) for p in ITL_PERCENTILES) if itl else None,
+        )
+
+    @property
+    def language(self) -> str:
+        return LANGUAGE_CODES.decode(self.language_code)
+
+    @property
+    def category(self) -> str:
+        return CATEGORY_CODES.decode(self.category_code)
+
+    @property
+    def language_name(self) -> str:
+        return LANG_NAMES.get(self.language, self.language)
+
+    @property
+    def usage(self) -> dict | None:
+        if self.total_tokens is None and self.completion_tokens is None:
+            return None
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+        }
+
+    @property
+    def itl_ms(self) -> dict | None:
+        return dict(zip(ITL_PERCENTILES, self.itl)) if self.itl else None
+
+    def to_dict(self) -> dict:
+        """The record in the response file's entry layout."""
+        entry = {
+            "question_id": self.question_id,
+            "category": self.category,
+            "language": self.language,
+            "sample_index": self.sample_index,
+            "question": self.question,
+            "answer": self.answer,
+            "usage": self.usage,
+            "latency_seconds": self.latency_seconds,
+            "error": self.error,
+        }
+        for field in ("ttft_seconds", "tokens_per_second", "itl_ms"):
+            value = getattr(self, field)
+            if value is not None:
+                entry[field] = value
+        return entry
+
+    def __reduce__(self):
+        # Codes are only meaningful within one process; pickle the decoded values
+        # so records can be sent to worker processes and st.cache_data
+        return _restore, (self.model, self.to_dict())
+
+    def __repr__(self) -> str:
+        return (
+            f"Response(model={self.model!r}, question_id={self.question_id}, "
+            f"language={self.language!r}, sample_index={self.sample_index})"
+        )
+
+
+def _restore(model: str, entry: dict) -> Response:
+    return Response.from_entry(entry, model)
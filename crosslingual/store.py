@@ -0,0 +1,113 @@
+"""
+Results Store
+==============
+Columnar, model-partitioned storage for the analysis tables.
+
+Each table lives under `results/store/<table>/model=<key>/*.parquet`.
+Repeated strings (question, model_name, language, category, ...) are
+stored as dictionary-encoded categoricals, and readers load only the
+models and columns they ask for. The CSV files are still written as an
+export. pyarrow is optional: without it, or when the CSV is newer than
+the store, readers fall back to the CSV.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import shutil
+from pathlib import Path
+
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+STORE_DIR = ROOT_DIR / "results" / "store"
+
+# String columns that repeat on every row and compress to dictionary codes
+CATEGORICAL_COLUMNS = (
+    "model_name", "language", "language_name", "category", "question", "lang_pair",
+)
+
+PARTITION_COLUMN = "model"
+
+
+def has_parquet() -> bool:
+    """True if pyarrow is installed."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def table_path(name: str) -> Path:
+    return STORE_DIR / name
+
+
+def write_table(name: str, df: pd.DataFrame, csv_path: Path | None = None) -> Path | None:
+    """
+    Replace table `name` with `df` and export it to `csv_path`.
+
+    Returns the table directory, or None when only the CSV was written:
+    pyarrow is unavailable, or `df` has no rows, in which case any stored
+    copy is removed so readers fall back to the (header-only) CSV.
+    """
+    if csv_path is not None:
+        csv_path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(csv_path, index=False)
+    if not has_parquet():
+        return None
+    if df.empty:
+        # A partitioned dataset of zero rows has no files to write
+        shutil.rmtree(table_path(name), ignore_errors=True)
+        return None
+
+    encoded = df.copy()
+    for column in CATEGORICAL_COLUMNS:
+        if column in encoded.columns:
+            encoded[column] = encoded[column].astype("category")
+    # Optional metrics that were never recorded (e.g. latency without --stream)
+    # are all-None objects; store them as float NaN like the CSV round trip does
+    for column in encoded.columns[encoded.isna().all()]:
+        encoded[column] = encoded[column].astype("float64")
+
+    # Build the new table beside the old one, then swap directories
+    path = table_path(name)
+    tmp_path = path.with_name(path.name + ".tmp")
+    old_path = path.with_name(path.name + ".old")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.parent.mkdir(parents=True, exist_ok=True)
+    encoded.to_parquet(tmp_path, partition_cols=[PARTITION_COLUMN], index=False)
+    if path.exists():
+        path.rename(old_path)
+    tmp_path.rename(path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return path
+
+
+def read_table(
+    name: str,
+    csv_path: Path | None = None,
+    models: list[str] | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Load table `name`, reading only the partitions of `models` and the given
+    `columns`. Falls back to `csv_path`; returns an empty frame if neither exists.
+    """
+    path = table_path(name)
+    csv_is_newer = (
+        csv_path is not None and csv_path.exists() and path.exists()
+        and csv_path.stat().st_mtime > path.stat().st_mtime
+    )
+    if has_parquet() and path.exists() and not csv_is_newer:
+        filters = [(PARTITION_COLUMN, "in", list(models))] if models else None
+        df = pd.read_parquet(path, columns=columns, filters=filters)
+        if PARTITION_COLUMN in df.columns:
+            # Partition values come back as a categorical over every partition on disk
+            df[PARTITION_COLUMN] = df[PARTITION_COLUMN].cat.remove_unused_categories()
+        return df
+
+    if csv_path is None or not csv_path.exists():
+        return pd.DataFrame()
+    df = pd.read_csv(csv_path, usecols=columns)
+    if models:
+        df = df[df[PARTITION_COLUMN].isin(models)]
+    return df
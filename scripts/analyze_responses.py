@@ -8,32 +8,59 @@ Analyzes LLM responses for cross-lingual bias indicators:
 - Assertiveness / confidence scoring
 - Sentiment polarity estimation
 - Category-level aggregation
+- Sample-to-sample spread when prompts were sampled more than once
 
 Usage:
     python scripts/analyze_responses.py
     python scripts/analyze_responses.py --models llama3-8b qwen2.5-7b
+    python scripts/analyze_responses.py --workers 8   # Parallel analysis
+    python scripts/analyze_responses.py --full        # Ignore cached rows
+
+Rows are cached per response fingerprint, so re-runs only analyze new or
+changed responses.
 """
 
+from __future__ import annotations
+
 import json
 import re
 import argparse
 import csv
+import functools
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from collections import defaultdict
+from collections import Counter, defaultdict
+from typing import Iterable, Iterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from crosslingual import (
+    CATEGORIES, LANG_NAMES, LANGUAGES, Response,
+    discover_models, iter_records, model_name,
+)
+from crosslingual.journal import write_json_atomic
+from crosslingual.lazy import lazy_import
+from crosslingual.store import write_table
 
-import pandas as pd
-import numpy as np
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
 
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
-RESPONSES_DIR = ROOT_DIR / "results" / "responses"
 OUTPUT_CSV = ROOT_DIR / "results" / "analysis_summary.csv"
+DIVERGENCE_CSV = ROOT_DIR / "results" / "divergence_scores.csv"
+ROW_CACHE_FILE = ROOT_DIR / "results" / "cache" / "analysis_rows.json"
 
-LANGUAGES = ["en", "ru", "zh", "kz"]
-LANG_NAMES = {"en": "English", "ru": "Russian", "zh": "Chinese", "kz": "Kazakh"}
+# Max responses per worker task; larger (model, language) shards are split
+SHARD_SIZE = 2000
+
+# Bump whenever analyze_response() would produce different rows for the same entry
+ANALYZER_VERSION = 1
 
 # ---------------------------------------------------------------------------
 # Disclaimer / Hedging Patterns (multilingual)
@@ -113,26 +140,58 @@ def count_words(text: str, language: str) -> int:
     return len(text.split())
 
 
+@functools.lru_cache(maxsize=None)
+def get_marker_matcher(language: str) -> tuple[re.Pattern, dict]:
+    """
+    Compile a language's disclaimer and assertive patterns into one alternation.
+
+    Each pattern becomes a named group (d0.., a0..); the returned dict maps
+    group names back to ("disclaimer" | "assertive", pattern).
+    """
+    groups = {}
+    for prefix, kind, table in (("d", "disclaimer", DISCLAIMER_PATTERNS),
+                                ("a", "assertive", ASSERTIVE_MARKERS)):
+        for i, pattern in enumerate(table.get(language, table["en"])):
+            groups[f"{prefix}{i}"] = (kind, pattern)
+    matcher = re.compile("|".join(f"(?P<{name}>{pattern})" for name, (_, pattern) in groups.items()))
+    return matcher, groups
+
+
+def scan_markers(text: str, language: str) -> dict:
+    """
+    Count disclaimer and assertive markers in a single pass over the lowercased text.
+
+    Returns {"disclaimers": int, "assertive": int, "hits": {pattern: count}}.
+    Matches do not overlap: text consumed by one marker cannot also count
+    towards another (disclaimers win ties at the same position).
+    """
+    counts = {"disclaimer": 0, "assertive": 0}
+    hits = Counter()
+    if text:
+        matcher, groups = get_marker_matcher(language)
+        for match in matcher.finditer(text.lower()):
+            kind, pattern = groups[match.lastgroup]
+            counts[kind] += 1
+            hits[pattern] += 1
+    return {"disclaimers": counts["disclaimer"], "assertive": counts["assertive"], "hits": dict(hits)}
+
+
+def confidence_from_counts(assertive: int, disclaimers: int) -> float:
+    """Share of assertive markers among all markers; 0.5 when there are none."""
+    total = assertive + disclaimers
+    if total == 0:
+        return 0.5  # neutral
+    return round(assertive / total, 3)
+
+
 def count_disclaimers(text: str, language: str) -> int:
     """Count disclaimer/hedging patterns in text."""
-    if not text:
-        return 0
-    count = 0
-    patterns = DISCLAIMER_PATTERNS.get(language, DISCLAIMER_PATTERNS["en"])
-    for pattern in patterns:
-        count += len(re.findall(pattern, text.lower()))
-    return count
+    return scan_markers(text, language)["disclaimers"]
 
 
 def count_assertiveness(text: str, language: str) -> int:
     """Count assertive/confident language markers."""
-    if not text:
-        return 0
-    count = 0
-    patterns = ASSERTIVE_MARKERS.get(language, ASSERTIVE_MARKERS["en"])
-    for pattern in patterns:
-        count += len(re.findall(pattern, text.lower()))
-    return count
+    return scan_markers(text, language)["assertive"]
 
 
 def compute_confidence_score(text: str, language: str) -> float:
@@ -143,56 +202,197 @@ def compute_confidence_score(text: str, language: str) -> float:
     """
     if not text:
         return 0.0
-    assertive = count_assertiveness(text, language)
-    disclaimers = count_disclaimers(text, language)
-    total = assertive + disclaimers
-    if total == 0:
-        return 0.5  # neutral
-    return round(assertive / total, 3)
+    markers = scan_markers(text, language)
+    return confidence_from_counts(markers["assertive"], markers["disclaimers"])
 
 
-def analyze_response(entry: dict) -> dict:
-    """Analyze a single response entry."""
-    text = entry.get("answer", "") or ""
-    lang = entry.get("language", "en")
+def analyze_response(record: Response) -> dict:
+    """Analyze a single response."""
+    text = record.answer
+    lang = record.language
+    itl = record.itl_ms or {}
+    markers = scan_markers(text, lang)
 
     return {
-        "question_id": entry["question_id"],
-        "category": entry["category"],
+        "question_id": record.question_id,
+        "category": record.category,
         "language": lang,
-        "language_name": LANG_NAMES.get(lang, lang),
-        "question": entry.get("question", ""),
+        "sample_index": record.sample_index,
+        "language_name": record.language_name,
+        "question": record.question,
         "answer_length_chars": len(text),
         "answer_length_words": count_words(text, lang),
-        "num_disclaimers": count_disclaimers(text, lang),
-        "num_assertive_markers": count_assertiveness(text, lang),
-        "confidence_score": compute_confidence_score(text, lang),
-        "has_error": entry.get("error") is not None,
-        "latency_seconds": entry.get("latency_seconds", 0),
+        "num_disclaimers": markers["disclaimers"],
+        "num_assertive_markers": markers["assertive"],
+        "confidence_score": (
+            confidence_from_counts(markers["assertive"], markers["disclaimers"]) if text else 0.0
+        ),
+        "has_error": record.error is not None,
+        "latency_seconds": record.latency_seconds,
+        "completion_tokens": record.completion_tokens,
+        # Streaming metrics (only present for runs with --stream)
+        "ttft_seconds": record.ttft_seconds,
+        "tokens_per_second": record.tokens_per_second,
+        "itl_p50_ms": itl.get("p50"),
+        "itl_p90_ms": itl.get("p90"),
+        "itl_p99_ms": itl.get("p99"),
     }
 
 
-def load_responses(model_key: str) -> dict:
-    """Load response file for a model."""
-    path = RESPONSES_DIR / f"{model_key}_responses.json"
-    if not path.exists():
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+@functools.lru_cache(maxsize=None)
+def analysis_version() -> str:
+    """Analyzer version plus a hash of the marker pattern sets."""
+    patterns = json.dumps([DISCLAIMER_PATTERNS, ASSERTIVE_MARKERS], sort_keys=True, ensure_ascii=False)
+    return f"{ANALYZER_VERSION}-{hashlib.sha256(patterns.encode('utf-8')).hexdigest()[:16]}"
+
+
+def entry_fingerprint(model_key: str, model_name: str, record: Response) -> str:
+    """Hash of everything an analysis row depends on: the response, its model and the analyzer."""
+    payload = json.dumps(
+        [analysis_version(), model_key, model_name, record.to_dict()],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
-def discover_models() -> list[str]:
-    """Find all available response files."""
-    if not RESPONSES_DIR.exists():
-        return []
-    models = []
-    for path in RESPONSES_DIR.glob("*_responses.json"):
-        model_key = path.stem.replace("_responses", "")
-        models.append(model_key)
-    return sorted(models)
+def load_row_cache() -> dict:
+    """Load cached analysis rows (fingerprint -> row) written by the last run."""
+    if not ROW_CACHE_FILE.exists():
+        return {}
+    with open(ROW_CACHE_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != analysis_version():
+        return {}
+    return data.get("rows", {})
 
 
-def run_analysis(model_keys: list[str] | None = None):
+def save_row_cache(rows: dict):
+    write_json_atomic(ROW_CACHE_FILE, {"version": analysis_version(), "rows": rows}, indent=None)
+
+
+def analyze_shard(tasks: list[tuple]) -> list[tuple[int, dict]]:
+    """Analyze (index, model_key, model_name, record) tasks; keep the index for ordering."""
+    results = []
+    for index, model_key, model_name, record in tasks:
+        result = analyze_response(record)
+        result["model"] = model_key
+        result["model_name"] = model_name
+        results.append((index, result))
+    return results
+
+
+def shard_tasks(tasks: list[tuple]) -> list[list[tuple]]:
+    """Split tasks into per-(model, language) chunks of at most SHARD_SIZE."""
+    groups = defaultdict(list)
+    for task in tasks:
+        groups[(task[1], task[3].language)].append(task)
+    return [
+        group[start:start + SHARD_SIZE]
+        for group in groups.values()
+        for start in range(0, len(group), SHARD_SIZE)
+    ]
+
+
+def analyze_incremental(tasks: Iterable[tuple], workers: int = 1) -> tuple[list[dict], int]:
+    """
+    Analyze only tasks whose fingerprint has no cached row; reuse the rest.
+
+    `tasks` is consumed lazily and only entries that need analysis are kept.
+    The row cache is rewritten with exactly the current rows, so entries that
+    disappeared are pruned. Returns (rows in task order, number reused).
+    """
+    cached = load_row_cache()
+    fingerprints = []
+    todo = []
+    for task in tasks:
+        fp = entry_fingerprint(task[1], task[2], task[3])
+        fingerprints.append(fp)
+        if fp not in cached:
+            todo.append(task)
+    fresh = iter(analyze_tasks(todo, workers))
+
+    rows = {}
+    results = []
+    for fp in fingerprints:
+        row = cached[fp] if fp in cached else next(fresh)
+        rows[fp] = row
+        results.append(row)
+    save_row_cache(rows)
+    return results, len(fingerprints) - len(todo)
+
+
+def analyze_tasks(tasks: list[tuple], workers: int = 1) -> list[dict]:
+    """
+    Analyze tasks serially or on a process pool.
+
+    Results are re-sorted by the original task index, so the output is
+    identical whatever the number of workers or the shard completion order.
+    """
+    if workers <= 1 or len(tasks) <= SHARD_SIZE // 4:
+        indexed = analyze_shard(tasks)
+    else:
+        shards = shard_tasks(tasks)
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            indexed = [item for shard in pool.map(analyze_shard, shards) for item in shard]
+        indexed.sort(key=lambda item: item[0])
+    return [result for _, result in indexed]
+
+
+def compute_divergence(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cross-lingual divergence of every (model, question) in two grouped passes.
+
+    Samples are averaged per language first so divergence reflects languages,
+    not sampling noise; the std across languages is then taken per question.
+    Questions answered in fewer than two languages are dropped.
+    """
+    per_lang = df.groupby(["model", "question_id", "language"], as_index=False, sort=False).agg(
+        category=("category", "first"),
+        answer_length_words=("answer_length_words", "mean"),
+        confidence_score=("confidence_score", "mean"),
+        num_disclaimers=("num_disclaimers", "mean"),
+    )
+    div = per_lang.groupby(["model", "question_id"], as_index=False, sort=False).agg(
+        category=("category", "first"),
+        n_languages=("language", "size"),
+        length_std=("answer_length_words", "std"),
+        conf_std=("confidence_score", "std"),
+        disc_std=("num_disclaimers", "std"),
+    )
+    div = div[div["n_languages"] >= 2]
+    return pd.DataFrame({
+        "model": div["model"],
+        "question_id": div["question_id"],
+        "category": div["category"],
+        "length_divergence": div["length_std"].round(2),
+        "confidence_divergence": div["conf_std"].round(3),
+        "disclaimer_divergence": div["disc_std"].round(2),
+        "combined_score": (div["length_std"] * 0.3 + div["conf_std"] * 100 * 0.3
+                           + div["disc_std"] * 10 * 0.4).round(2),
+    }).reset_index(drop=True)
+
+
+def iter_tasks(model_keys: list[str]) -> Iterator[tuple]:
+    """Stream (index, model_key, model_name, record) for every successful response."""
+    index = 0
+    available = set(discover_models())
+    for model_key in model_keys:
+        if model_key not in available:
+            print(f"  ⚠️  No responses found for: {model_key}")
+            continue
+
+        name = model_name(model_key)
+        total = 0
+        for record in iter_records(model_key):
+            total += 1
+            if record.error:
+                continue
+            yield index, model_key, name, record
+            index += 1
+        print(f"  📊 Analyzing: {name} ({total} responses)")
+
+
+def run_analysis(model_keys: list[str] | None = None, workers: int = 1, incremental: bool = True):
     """Run full analysis pipeline."""
     if not model_keys:
         model_keys = discover_models()
@@ -205,27 +405,15 @@ def run_analysis(model_keys: list[str] | None = None):
     print(f"  Response Analysis Pipeline")
     print(f"{'='*60}")
     print(f"  Models: {', '.join(model_keys)}")
+    if workers > 1:
+        print(f"  Workers: {workers}")
     print(f"{'='*60}\n")
 
-    all_results = []
-
-    for model_key in model_keys:
-        data = load_responses(model_key)
-        if not data:
-            print(f"  ⚠️  No responses found for: {model_key}")
-            continue
-
-        model_name = data.get("model", model_key)
-        responses = data.get("responses", [])
-        print(f"  📊 Analyzing: {model_name} ({len(responses)} responses)")
-
-        for entry in responses:
-            if entry.get("error"):
-                continue
-            result = analyze_response(entry)
-            result["model"] = model_key
-            result["model_name"] = model_name
-            all_results.append(result)
+    if incremental:
+        all_results, reused = analyze_incremental(iter_tasks(model_keys), workers)
+        print(f"\n  ♻️  Reused {reused} cached rows, analyzed {len(all_results) - reused} new or changed")
+    else:
+        all_results = analyze_tasks(list(iter_tasks(model_keys)), workers)
 
     if not all_results:
         print("\n❌ No valid responses to analyze.")
@@ -234,10 +422,9 @@ def run_analysis(model_keys: list[str] | None = None):
     # Create DataFrame
     df = pd.DataFrame(all_results)
 
-    # Save full results
-    OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(OUTPUT_CSV, index=False)
-    print(f"\n  📁 Full results saved to: {OUTPUT_CSV}")
+    # Save full results (columnar store + CSV export)
+    store_path = write_table("analysis_summary", df, OUTPUT_CSV)
+    print(f"\n  📁 Full results saved to: {store_path or OUTPUT_CSV}")
 
     # Print summary statistics
     print(f"\n{'='*60}")
@@ -278,51 +465,69 @@ def run_analysis(model_keys: list[str] | None = None):
             "confidence_score": "mean",
         }).round(2)
 
-        for cat in ["factual", "opinion", "commonsense"]:
+        for cat in CATEGORIES:
             if cat in cat_stats.index:
                 row = cat_stats.loc[cat]
                 print(f"    {cat:<15} avg_words={row['answer_length_words']:.0f}  "
                       f"disclaimers={row['num_disclaimers']:.2f}  "
                       f"confidence={row['confidence_score']:.3f}")
 
+        # Sample-to-sample spread (only meaningful with --samples > 1)
+        if model_df["sample_index"].nunique() > 1:
+            spread = model_df.groupby(["language", "question_id"]).agg({
+                "answer_length_words": "std",
+                "confidence_score": "std",
+            }).groupby("language").mean()
+
+            print(f"\n  Sample spread (mean within-prompt std, "
+                  f"{model_df['sample_index'].nunique()} samples):")
+            for lang in LANGUAGES:
+                if lang in spread.index:
+                    row = spread.loc[lang]
+                    print(f"    {LANG_NAMES[lang]:<12} words_std={row['answer_length_words']:.1f}  "
+                          f"confidence_std={row['confidence_score']:.3f}")
+
+        # Latency & throughput (only for responses recorded with --stream)
+        streamed = model_df.dropna(subset=["ttft_seconds"])
+        if not streamed.empty:
+            perf = streamed.groupby("language").agg({
+                "ttft_seconds": "median",
+                "tokens_per_second": "median",
+                "itl_p50_ms": "median",
+                "itl_p99_ms": "median",
+            })
+
+            print(f"\n  Latency & throughput (medians over {len(streamed)} streamed responses):")
+            for lang in LANGUAGES:
+                if lang in perf.index:
+                    row = perf.loc[lang]
+                    print(f"    {LANG_NAMES[lang]:<12} ttft={row['ttft_seconds']:.2f}s  "
+                          f"tok/s={row['tokens_per_second']:.1f}  "
+                          f"itl_p50={row['itl_p50_ms']:.1f}ms  "
+                          f"itl_p99={row['itl_p99_ms']:.1f}ms")
+
     # Cross-lingual divergence report
     print(f"\n{'='*60}")
     print(f"  Cross-Lingual Divergence Analysis")
     print(f"{'='*60}\n")
 
+    div_df = compute_divergence(df)
+    div_store_path = write_table("divergence_scores", div_df, DIVERGENCE_CSV)
+
     for model_key in df["model"].unique():
-        model_df = df[df["model"] == model_key]
-        model_name = model_df["model_name"].iloc[0]
+        model_name = df.loc[df["model"] == model_key, "model_name"].iloc[0]
         print(f"  🤖 {model_name}")
 
-        # Find questions where response length varies most across languages
-        divergence = []
-        for qid in model_df["question_id"].unique():
-            q_df = model_df[model_df["question_id"] == qid]
-            if len(q_df) < 2:
-                continue
-            length_std = q_df["answer_length_words"].std()
-            conf_std = q_df["confidence_score"].std()
-            disc_std = q_df["num_disclaimers"].std()
-            divergence.append({
-                "question_id": qid,
-                "category": q_df["category"].iloc[0],
-                "length_divergence": round(length_std, 2),
-                "confidence_divergence": round(conf_std, 3),
-                "disclaimer_divergence": round(disc_std, 2),
-                "combined_score": round(length_std * 0.3 + conf_std * 100 * 0.3
-                                       + disc_std * 10 * 0.4, 2),
-            })
-
-        if divergence:
-            div_df = pd.DataFrame(divergence).sort_values(
-                "combined_score", ascending=False
-            )
+        model_div = div_df[div_df["model"] == model_key].sort_values(
+            "combined_score", ascending=False, kind="stable"
+        )
+        if not model_div.empty:
             print(f"\n  Top 10 most divergent questions:")
-            for i, row in div_df.head(10).iterrows():
+            for _, row in model_div.head(10).iterrows():
                 print(f"    Q{row['question_id']:>2d} [{row['category']:<11s}] "
                       f"combined_score={row['combined_score']:.2f}")
 
+    print(f"\n  📁 Divergence scores saved to: {div_store_path or DIVERGENCE_CSV}")
     print(f"\n✅ Analysis complete!\n")
 
 
@@ -332,8 +537,16 @@ def main():
         "--models", nargs="+", default=None,
         help="Model keys to analyze (default: all available)",
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Analysis processes, sharded by model/language (0 = all cores, default: 1)",
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Re-analyze every response instead of reusing cached rows",
+    )
     args = parser.parse_args()
-    run_analysis(args.models)
+    run_analysis(args.models, args.workers or os.cpu_count() or 1, incremental=not args.full)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+==================
+Guards startup time of the cheap paths: every script's `--help`, the
+`query_llms.py --dry-run` config check, the app's data layer and, when
+streamlit is installed, the app's cold start. Each runs under
+`python -X importtime`, which logs the time spent importing each module.
+A command fails the benchmark if its median total import time over
+`--runs` starts exceeds its budget, or if any heavy dependency (pandas,
+numpy, matplotlib, the encoders, ...) is imported anywhere in the import
+tree, directly or by a local module, without being allowed for that
+command. Those must stay lazy (see crosslingual/lazy.py).
+
+Usage:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --runs 5 --budget-ms 150
+    python scripts/bench_startup.py --top 10           # Show the slowest imports
+"""
+
+import argparse
+import importlib.util
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPTS_DIR.parent
+
+# Total import time allowed per command (median over runs)
+BUDGET_MS = 150
+
+# A dry run validates API keys by building each provider's SDK client
+DRY_RUN_BUDGET_MS = 700
+
+# Streamlit itself dominates the app's cold start
+APP_BUDGET_MS = 2500
+
+# Top-level packages that must not be imported just to start a script
+HEAVY_MODULES = (
+    "numpy", "pandas", "pyarrow", "matplotlib", "seaborn", "plotly", "tqdm",
+    "torch", "sentence_transformers", "transformers", "onnxruntime",
+    "openai", "httpx", "groq", "google", "streamlit",
+)
+
+# Heavy packages streamlit imports on its own; the app must add none
+STREAMLIT_DEPS = ("streamlit", "pandas", "numpy", "pyarrow", "tqdm", "httpx")
+
+# (python arguments run from the repo root, budget in ms, heavy packages allowed,
+#  module the command needs; it is skipped when that module is not installed)
+COMMANDS = [
+    (["scripts/query_llms.py", "--help"], BUDGET_MS, (), None),
+    (["scripts/analyze_responses.py", "--help"], BUDGET_MS, (), None),
+    (["scripts/similarity_analysis.py", "--help"], BUDGET_MS, (), None),
+    (["scripts/visualize.py", "--help"], BUDGET_MS, (), None),
+    (["scripts/nearest_responses.py", "--help"], BUDGET_MS, (), None),
+    (["scripts/mock_provider.py", "--help"], BUDGET_MS, (), None),
+    (
+        ["scripts/query_llms.py", "--dry-run", "--models", "mock"],
+        DRY_RUN_BUDGET_MS, ("openai", "httpx"), "openai",
+    ),
+    (["-c", "import crosslingual, crosslingual.store"], BUDGET_MS, (), None),
+    (["app.py"], APP_BUDGET_MS, STREAMLIT_DEPS, "streamlit"),
+]
+
+# "import time:  self [us] | cumulative | <indent>package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(command: list[str]) -> tuple[float, dict[str, int], set[str], int]:
+    """
+    Start one command under -X importtime. Returns total import time in ms,
+    cumulative microseconds per top-level import, every module imported at
+    any depth, and the exit code.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        capture_output=True, text=True, cwd=ROOT_DIR,
+    )
+    total_us = 0
+    top_level = {}
+    imported = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        total_us += int(self_us)
+        imported.add(module)
+        if len(indent) == 1:
+            top_level[module] = int(cumulative_us)
+    return total_us / 1000, top_level, imported, proc.returncode
+
+
+def heavy_imports(modules: set[str], allowed: tuple[str, ...] = ()) -> list[str]:
+    """Heavy top-level packages among `modules`, wherever they were imported."""
+    return sorted({
+        module.split(".")[0] for module in modules
+        if module.split(".")[0] in HEAVY_MODULES and module.split(".")[0] not in allowed
+    })
+
+
+def run_benchmark(runs: int = 3, budget_ms: float = BUDGET_MS, top: int = 0) -> bool:
+    """Measure every command; returns True if all stay within budget."""
+    print(f"\n{'='*60}")
+    print(f"  CLI Startup Benchmark")
+    print(f"{'='*60}")
+    print(f"  Runs per command: {runs}")
+    print(f"  Import budget:    {budget_ms:.0f} ms "
+          f"(dry run {DRY_RUN_BUDGET_MS} ms, app {APP_BUDGET_MS} ms)")
+    print(f"{'='*60}\n")
+
+    print(f"  {'Command':<52} {'Import ms':>10}  Status")
+    print(f"  {'─'*72}")
+    passed = True
+    for command, command_budget, allowed, requires in COMMANDS:
+        label = " ".join(command)
+        if requires and importlib.util.find_spec(requires) is None:
+            print(f"  {label:<52} {'—':>10}  ⏭️  skipped ({requires} not installed)")
+            continue
+        # --budget-ms scales every command's budget alike
+        limit = command_budget * budget_ms / BUDGET_MS
+        results = [measure(command) for _ in range(runs)]
+        median_ms = statistics.median(ms for ms, _, _, _ in results)
+        _, modules, imported, returncode = results[-1]
+        heavy = heavy_imports(imported, allowed)
+
+        problems = []
+        if returncode != 0:
+            problems.append(f"exit code {returncode}")
+        if median_ms > limit:
+            problems.append(f"over {limit:.0f} ms budget")
+        if heavy:
+            problems.append(f"imports {', '.join(heavy)}")
+        passed &= not problems
+
+        status = "✅" if not problems else f"❌ {'; '.join(problems)}"
+        print(f"  {label:<52} {median_ms:>10.1f}  {status}")
+        if top:
+            slowest = sorted(modules.items(), key=lambda item: -item[1])[:top]
+            for module, cumulative_us in slowest:
+                print(f"      {module:<34} {cumulative_us / 1000:>10.1f}")
+
+    if passed:
+        print(f"\n✅ All commands start within their import budgets.\n")
+    else:
+        print(f"\n❌ Startup regressed — move the offending imports behind lazy_import().\n")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fail if CLI startup import time regresses"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3,
+        help="Starts per command; the median is compared to the budget (default: 3)",
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=BUDGET_MS,
+        help=f"Allowed import time per script in ms; the dry-run and app budgets "
+             f"scale with it (default: {BUDGET_MS})",
+    )
+    parser.add_argument(
+        "--top", type=int, default=0,
+        help="Also list the N slowest top-level imports per command",
+    )
+    args = parser.parse_args()
+    if not run_benchmark(args.runs, args.budget_ms, args.top):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Answer Chunking
+================
+Splits long answers on sentence boundaries into segments that fit the
+encoder's token window, pools segment embeddings back into one vector per
+answer, and scores how well two answers' segments align.
+
+Sentences are packed greedily, in order, until the next one would push the
+segment past the token budget; a single sentence longer than the budget is
+cut into near-equal word (or, for unspaced scripts like Chinese, character)
+runs.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Callable
+
+from crosslingual.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Sentence ends: Latin/Cyrillic punctuation followed by whitespace, CJK
+# full-width punctuation (no space follows it), or line breaks
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[。！？])|\s*\n+\s*")
+
+# Token-length estimate when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Special tokens ([CLS]/[SEP] or <s>/</s>) the encoder adds to every segment
+SPECIAL_TOKENS = 2
+
+
+def token_counter(tokenizer=None) -> Callable[[list[str]], list[int]]:
+    """Count tokens per text with `tokenizer`, or estimate them from characters."""
+    if tokenizer is None:
+        return lambda texts: [max(1, len(text) // CHARS_PER_TOKEN) for text in texts]
+    return lambda texts: [
+        len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]
+    ] if texts else []
+
+
+def split_sentences(text: str) -> list[str]:
+    return [part.strip() for part in SENTENCE_END.split(text) if part.strip()]
+
+
+def _split_long(sentence: str, pieces: int) -> list[str]:
+    """Cut a sentence into `pieces` runs of near-equal word (or character) count."""
+    spaced = " " in sentence
+    units = sentence.split() if spaced else list(sentence)
+    size = math.ceil(len(units) / pieces)
+    joiner = " " if spaced else ""
+    return [joiner.join(units[i:i + size]) for i in range(0, len(units), size)]
+
+
+def chunk_text(text: str, count_tokens: Callable, max_tokens: int) -> list[str]:
+    """Split `text` into sentence-aligned segments of at most ~`max_tokens` tokens."""
+    sentences = split_sentences(text)
+    if not sentences:
+        return [text]
+    units = []
+    for sentence, length in zip(sentences, count_tokens(sentences)):
+        if length > max_tokens:
+            pieces = _split_long(sentence, math.ceil(length / max_tokens))
+            units.extend(zip(pieces, count_tokens(pieces)))
+        else:
+            units.append((sentence, length))
+
+    segments = []
+    current, current_tokens = [], 0
+    for sentence, length in units:
+        if current and current_tokens + length > max_tokens:
+            segments.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += length
+    segments.append(" ".join(current))
+    return segments
+
+
+def segment_texts(
+    texts: list[str], count_tokens: Callable, window: int
+) -> tuple[list[str], np.ndarray]:
+    """
+    Chunk every text for an encoder with a `window`-token input. Texts that
+    already fit are kept whole. Returns the flat segment list and, per text,
+    the [start, end) offsets of its segments in that list.
+    """
+    budget = window - SPECIAL_TOKENS
+    segments = []
+    offsets = np.zeros(len(texts) + 1, dtype=np.intp)
+    for i, (text, length) in enumerate(zip(texts, count_tokens(texts))):
+        segments.extend([text] if length <= budget else chunk_text(text, count_tokens, budget))
+        offsets[i + 1] = len(segments)
+    return segments, offsets
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def pool_segments(vectors: np.ndarray, offsets: np.ndarray, pooling: str = "mean") -> np.ndarray:
+    """
+    One vector per text from its L2-normalized segment vectors, by `mean` or
+    element-wise `max`. A single-segment text keeps its own direction, so
+    short answers score exactly as without chunking.
+    """
+    unit = normalize(np.asarray(vectors, dtype=np.float32))
+    starts = offsets[:-1]
+    if pooling == "mean":
+        sums = np.add.reduceat(unit, starts, axis=0)
+        return sums / np.diff(offsets)[:, None]
+    if pooling == "max":
+        return np.maximum.reduceat(unit, starts, axis=0)
+    raise ValueError(f"Unknown pooling: {pooling}")
+
+
+def alignment_scores(a: np.ndarray, b: np.ndarray) -> tuple[float, float, float]:
+    """
+    Best-match alignment between two answers' unit segment vectors: how well
+    each of A's segments is matched somewhere in B (coverage_a), and vice
+    versa (coverage_b), plus their mean. Low coverage on one side means that
+    side says something the other answer does not.
+    """
+    sims = a @ b.T
+    coverage_a = float(sims.max(axis=1).mean())
+    coverage_b = float(sims.max(axis=0).mean())
+    return (coverage_a + coverage_b) / 2, coverage_a, coverage_b
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Embedding Cache
+================
+Persistent cache of sentence embeddings, keyed by (encoder name, text hash).
+
+Each encoder gets its own directory holding:
+- vectors.bin   raw (n, dim) matrix, appended to and read back as a memmap
+- index.txt     one SHA-256 text hash per line; line i is row i of vectors.bin
+- meta.json     encoder name, dimension and dtype
+
+Only texts whose hash is not in the index are sent to the encoder, so a
+re-run after adding one model encodes just that model's new answers.
+Vectors are written (and fsync'd) before their index lines, so a crash
+can at worst leave unindexed rows behind, never an index pointing at
+missing data.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable
+
+from crosslingual.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+# Bytes per index line: a hex SHA-256 digest plus newline
+INDEX_LINE_BYTES = 65
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Append-only, memory-mapped embedding store for one encoder.
+
+    `dtype` is the storage precision; a cache stored in another one is
+    started over. With dtype=None the cache keeps whatever precision it was
+    stored in (float32 for a new one), so readers never discard it.
+    """
+
+    def __init__(self, cache_dir: Path, encoder_name: str, dtype: str | None = "float32"):
+        self.dir = Path(cache_dir) / re.sub(r"[^\w.-]+", "--", encoder_name)
+        self.encoder_name = encoder_name
+        self.dtype = np.dtype(dtype) if dtype else None
+        self.dim = None
+        self._vectors_path = self.dir / "vectors.bin"
+        self._index_path = self.dir / "index.txt"
+        self._meta_path = self.dir / "meta.json"
+        self._index = {}
+        self._matrix = None
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self._meta_path.exists():
+            self.dtype = self.dtype or np.dtype("float32")
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if self.dtype is None:
+            self.dtype = np.dtype(meta.get("dtype", "float32"))
+        if meta.get("dtype") != self.dtype.name:
+            # Stored in another precision: start over rather than mix precisions
+            self._reset()
+            return
+        self.dim = meta["dim"]
+        if not (self._vectors_path.exists() and self._index_path.exists()):
+            return
+        rows = self._vectors_path.stat().st_size // (self.dim * self.dtype.itemsize)
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                if row >= rows or not line.endswith("\n"):
+                    break
+                self._index[line[:-1]] = row
+        self._map()
+
+    def _reset(self):
+        for path in (self._vectors_path, self._index_path, self._meta_path):
+            path.unlink(missing_ok=True)
+
+    def _map(self):
+        rows = len(self._index)
+        self._matrix = (
+            np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            if rows else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _append(self, hashes: list[str], vectors: np.ndarray):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self._meta_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"encoder": self.encoder_name, "dim": self.dim, "dtype": self.dtype.name}, f
+                )
+            # Drop any rows or index lines left over from an interrupted first write
+            self._vectors_path.unlink(missing_ok=True)
+            self._index_path.unlink(missing_ok=True)
+
+        # Cut whatever a crash left past the last complete row, then append
+        # vectors before the hashes that make them visible
+        rows = len(self._index)
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(rows * self.dim * self.dtype.itemsize)
+            f.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._index_path, "ab") as f:
+            f.truncate(rows * INDEX_LINE_BYTES)
+            f.write("".join(f"{h}\n" for h in hashes).encode("ascii"))
+            f.flush()
+            os.fsync(f.fileno())
+
+        for h in hashes:
+            self._index[h] = len(self._index)
+        self._map()
+
+    def embed(self, texts: list[str], encode: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return a (len(texts), dim) float32 matrix of embeddings, calling
+        `encode` once with only the distinct texts that are not cached yet.
+        """
+        hashes = [text_hash(text) for text in texts]
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in self._index and h not in missing:
+                missing[h] = text
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+
+        if missing:
+            vectors = np.asarray(encode(list(missing.values())))
+            self._append(list(missing), vectors)
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        rows = np.fromiter((self._index[h] for h in hashes), dtype=np.int64, count=len(hashes))
+        return np.asarray(self._matrix[rows], dtype=np.float32)
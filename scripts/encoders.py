@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Sentence Encoders
+==================
+CPU encoder backends for the similarity stage, all exposing the slice of
+the SentenceTransformer interface similarity_analysis.py uses
+(`encode`, `tokenizer`, `max_seq_length`):
+
+- torch       the SentenceTransformer model as published
+- onnx        the same transformer exported to ONNX, run by onnxruntime
+- onnx-int8   the ONNX export with dynamically quantized int8 weights
+
+The ONNX files are exported once (this step needs torch and
+sentence-transformers) and cached next to the tokenizer under
+results/cache/onnx/<model>/; later runs only need onnxruntime and
+transformers. Token vectors are mean-pooled over the attention mask,
+which is the pooling the multilingual MiniLM model was trained with.
+"""
+
+from __future__ import annotations
+
+import inspect
+import json
+import re
+from pathlib import Path
+
+from crosslingual.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+ONNX_CACHE_DIR = ROOT_DIR / "results" / "cache" / "onnx"
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+ONNX_OPSET = 14
+
+# Max |cosine| difference between the fp32 export and torch on the probe texts
+EXPORT_TOLERANCE = 1e-4
+PROBE_TEXTS = [
+    "The capital of Kazakhstan is Astana.",
+    "Столица Казахстана — Астана.",
+    "哈萨克斯坦的首都是阿斯塔纳。",
+    "Қазақстанның астанасы — Астана.",
+]
+
+
+def export_dir(model_name: str, cache_dir: Path | None = None) -> Path:
+    return (cache_dir or ONNX_CACHE_DIR) / re.sub(r"[^\w.-]+", "--", model_name)
+
+
+def mean_pool(hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token vectors over the real (unpadded) tokens of each text."""
+    mask = attention_mask[:, :, None].astype(hidden.dtype)
+    return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+class TorchEncoder:
+    """The SentenceTransformer model, optionally pinned to `threads` CPU threads."""
+
+    def __init__(self, model_name: str, threads: int | None = None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.tokenizer = self.model.tokenizer
+        self.max_seq_length = self.model.max_seq_length
+
+    def encode(self, texts: list[str], batch_size: int = 32, show_progress_bar: bool = False):
+        return self.model.encode(
+            texts, batch_size=batch_size, show_progress_bar=show_progress_bar,
+        )
+
+
+class OnnxEncoder:
+    """An exported transformer run by onnxruntime, mean-pooled in numpy."""
+
+    def __init__(self, model_dir: Path, quantized: bool = False, threads: int | None = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(model_dir / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.max_seq_length = meta["max_seq_length"]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        path = model_dir / ("model-int8.onnx" if quantized else "model.onnx")
+        self.session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"],
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, texts: list[str], batch_size: int = 32, show_progress_bar: bool = False):
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(
+                texts[start:start + batch_size], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            feed = {
+                name: np.asarray(value, dtype=np.int64)
+                for name, value in tokens.items() if name in self._inputs
+            }
+            hidden = self.session.run(None, feed)[0]
+            vectors.append(mean_pool(hidden, feed["attention_mask"]))
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(vectors).astype(np.float32)
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def _uses_mean_pooling(pooling) -> bool:
+    # Newer sentence-transformers name the mode; older ones set one flag per mode
+    mode = getattr(pooling, "pooling_mode", None)
+    if isinstance(mode, str):
+        return mode == "mean"
+    return bool(getattr(pooling, "pooling_mode_mean_tokens", False))
+
+
+def export_onnx(model_name: str, cache_dir: Path | None = None) -> Path:
+    """
+    Export the model's transformer to ONNX (fp32 and int8) with its tokenizer.
+    Returns the export directory; does nothing if the export already exists.
+    """
+    out_dir = export_dir(model_name, cache_dir)
+    if (out_dir / "meta.json").exists():
+        return out_dir
+
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    print(f"  Exporting {model_name} to ONNX (one-time)...")
+    model = SentenceTransformer(model_name, device="cpu")
+    if not _uses_mean_pooling(model[1]):
+        raise ValueError(f"{model_name} does not use mean pooling; ONNX export unsupported")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    class HiddenStates(torch.nn.Module):
+        # Keyword call, since transformers versions differ in positional order
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask):
+            return self.transformer(
+                input_ids=input_ids, attention_mask=attention_mask
+            ).last_hidden_state
+
+    transformer = HiddenStates(model[0].auto_model).eval()
+    sample = model.tokenizer(PROBE_TEXTS, padding=True, return_tensors="pt")
+    input_names = ["input_ids", "attention_mask"]
+    dynamic = {0: "batch", 1: "tokens"}
+    # torch >= 2.9 defaults to the dynamo exporter; keep the TorchScript one,
+    # which takes dynamic_axes and needs no onnxscript
+    exporter = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(out_dir / "model.onnx"),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: dynamic for name in input_names + ["last_hidden_state"]},
+            opset_version=ONNX_OPSET,
+            **exporter,
+        )
+    quantize_dynamic(
+        str(out_dir / "model.onnx"), str(out_dir / "model-int8.onnx"),
+        weight_type=QuantType.QInt8,
+    )
+    model.tokenizer.save_pretrained(out_dir)
+
+    # meta.json marks a complete export, so it is written last
+    meta = {"model": model_name, "max_seq_length": model.max_seq_length, "opset": ONNX_OPSET}
+    with open(out_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    reference = model.encode(PROBE_TEXTS)
+    exported = OnnxEncoder(out_dir).encode(PROBE_TEXTS)
+    drift = float(np.abs(1 - _cosine(reference, exported)).max())
+    if drift > EXPORT_TOLERANCE:
+        (out_dir / "meta.json").unlink()
+        raise RuntimeError(f"ONNX export differs from torch (cosine drift {drift:.2e})")
+    print(f"  💾 ONNX export cached in {out_dir}")
+    return out_dir
+
+
+def load_tokenizer(model_name: str):
+    """The model's tokenizer alone, or None if transformers is not installed."""
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        return None
+    return AutoTokenizer.from_pretrained(model_name)
+
+
+def load_encoder(model_name: str, backend: str = "torch", threads: int | None = None):
+    """Load `model_name` with the given backend (see BACKENDS)."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {backend} (expected one of {BACKENDS})")
+    print(f"  Loading model: {model_name} [{backend}]")
+    if backend == "torch":
+        print(f"  (First run downloads ~500MB, subsequent runs use cache)")
+        return TorchEncoder(model_name, threads)
+    model_dir = export_onnx(model_name)
+    return OnnxEncoder(model_dir, quantized=backend == "onnx-int8", threads=threads)
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Mock LLM Provider
+==================
+Local OpenAI-compatible chat-completions server for offline load testing.
+
+Speaks the same `/v1/chat/completions` API as the Ollama path, so the
+query engine, rate limiter, cache and journal can be benchmarked on a
+laptop with no API keys or network. Latency, error rate, 429 injection
+(with Retry-After), an optional hard RPM ceiling, answer length and
+per-token decode time are all configurable. `"stream": true` requests are
+answered as server-sent `chat.completion.chunk` events, one word per chunk.
+The OpenAI Batch API (`/v1/files` + `/v1/batches`) is emulated too: a
+batch is processed on a background thread and its output and error files
+can be downloaded once it completes.
+
+Usage:
+    python scripts/mock_provider.py --port 8089 --latency-ms 400 --rate-limit-rate 0.05
+    MOCK_BASE_URL=http://127.0.0.1:8089 python scripts/query_llms.py --models mock
+
+When MOCK_BASE_URL is unset, query_llms.py starts an embedded server
+configured from MOCK_* environment variables (see MockConfig.from_env).
+"""
+
+import argparse
+import json
+from email.parser import BytesParser
+from email.policy import HTTP
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "the model answer question language context because however example "
+    "important history culture people country capital science data result "
+    "general often usually many some different first second also which"
+).split()
+
+
+class MockConfig:
+    """Behaviour knobs for the mock provider."""
+
+    def __init__(
+        self,
+        latency_ms: float = 400.0,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        rpm_limit: int | None = None,
+        answer_words: int = 80,
+        answer_words_sd: float = 30.0,
+        token_ms: float = 5.0,
+        batch_ms: float = 2.0,
+        seed: int | None = None,
+    ):
+        self.latency_ms = latency_ms          # median of a log-normal latency
+        self.latency_sigma = latency_sigma    # log-space spread; 0 = fixed latency
+        self.error_rate = error_rate          # probability of an HTTP 500
+        self.rate_limit_rate = rate_limit_rate  # probability of an injected 429
+        self.retry_after = retry_after        # Retry-After seconds sent with 429s
+        self.rpm_limit = rpm_limit            # hard sliding-window ceiling, like a real tier
+        self.answer_words = answer_words
+        self.answer_words_sd = answer_words_sd
+        self.token_ms = token_ms              # decode time per generated token
+        self.batch_ms = batch_ms              # processing time per batch request
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls) -> "MockConfig":
+        """Build a config from MOCK_* environment variables."""
+        def env(name, cast, default):
+            value = os.getenv(name)
+            return cast(value) if value not in (None, "") else default
+
+        return cls(
+            latency_ms=env("MOCK_LATENCY_MS", float, 400.0),
+            latency_sigma=env("MOCK_LATENCY_SIGMA", float, 0.5),
+            error_rate=env("MOCK_ERROR_RATE", float, 0.0),
+            rate_limit_rate=env("MOCK_429_RATE", float, 0.0),
+            retry_after=env("MOCK_RETRY_AFTER", float, 1.0),
+            rpm_limit=env("MOCK_RPM_LIMIT", int, None),
+            answer_words=env("MOCK_ANSWER_WORDS", int, 80),
+            answer_words_sd=env("MOCK_ANSWER_WORDS_SD", float, 30.0),
+            token_ms=env("MOCK_TOKEN_MS", float, 5.0),
+            batch_ms=env("MOCK_BATCH_MS", float, 2.0),
+            seed=env("MOCK_SEED", int, None),
+        )
+
+
+class MockBackend:
+    """Generates completions and failure modes according to a MockConfig."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._recent = deque()  # request timestamps for the RPM ceiling
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+        self.files = {}    # file_id -> (file object, content bytes)
+        self.batches = {}  # batch_id -> batch object
+
+    def _draw(self, fn, *args):
+        with self._lock:
+            return fn(*args)
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before responding."""
+        cfg = self.config
+        if cfg.latency_sigma <= 0:
+            return cfg.latency_ms / 1000.0
+        mu = math.log(max(cfg.latency_ms, 1e-3))
+        return self._draw(self._rng.lognormvariate, mu, cfg.latency_sigma) / 1000.0
+
+    def admit(self) -> tuple[int, float | None]:
+        """Decide the outcome of a request: (HTTP status, retry_after)."""
+        cfg = self.config
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            if cfg.rpm_limit:
+                while self._recent and now - self._recent[0] > 60.0:
+                    self._recent.popleft()
+                if len(self._recent) >= cfg.rpm_limit:
+                    self.stats["rate_limited"] += 1
+                    return 429, max(0.0, 60.0 - (now - self._recent[0]))
+                self._recent.append(now)
+            roll = self._rng.random()
+        if roll < cfg.rate_limit_rate:
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            return 429, cfg.retry_after
+        if roll < cfg.rate_limit_rate + cfg.error_rate:
+            with self._lock:
+                self.stats["errors"] += 1
+            return 500, None
+        return 200, None
+
+    def generate_answer(self) -> str:
+        cfg = self.config
+        with self._lock:
+            n = max(1, int(self._rng.gauss(cfg.answer_words, cfg.answer_words_sd)))
+            words = [self._rng.choice(WORDS) for _ in range(n)]
+        return " ".join(words).capitalize() + "."
+
+    @staticmethod
+    def prompt_tokens(body: dict) -> int:
+        prompt_chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+        return max(1, prompt_chars // 4)
+
+    @staticmethod
+    def usage(prompt_tokens: int, completion_tokens: int) -> dict:
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def completion(self, body: dict) -> dict:
+        """Build an OpenAI-style chat.completion object for a request body."""
+        n = int(body.get("n") or 1)
+        prompt_tokens = self.prompt_tokens(body)
+        choices = []
+        completion_tokens = 0
+        for index in range(n):
+            answer = self.generate_answer()
+            completion_tokens += int(len(answer.split()) * 1.3)
+            choices.append({
+                "index": index,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            })
+        with self._lock:
+            self.stats["ok"] += 1
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock-chat"),
+            "choices": choices,
+            "usage": self.usage(prompt_tokens, completion_tokens),
+        }
+
+    def stream_chunks(self, body: dict):
+        """
+        Yield (delay_seconds, chat.completion.chunk) pairs for a streamed reply.
+
+        Each word is one token; the delays reproduce the decode rate.
+        """
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        model = body.get("model", "mock-chat")
+        words = self.generate_answer().split(" ")
+        token_delay = self.config.token_ms / 1000.0
+
+        def chunk(delta: dict, finish_reason=None, usage=None) -> dict:
+            return {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [] if usage else [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                **({"usage": usage} if usage else {}),
+            }
+
+        yield 0.0, chunk({"role": "assistant", "content": ""})
+        for i, word in enumerate(words):
+            yield token_delay, chunk({"content": word if i == 0 else " " + word})
+        yield 0.0, chunk({}, finish_reason="stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            yield 0.0, chunk({}, usage=self.usage(self.prompt_tokens(body), len(words)))
+        with self._lock:
+            self.stats["ok"] += 1
+
+    def create_file(self, filename: str, purpose: str, content: bytes) -> dict:
+        """Store an uploaded (or generated) file and return its file object."""
+        file_obj = {
+            "id": f"file-{uuid.uuid4().hex[:24]}",
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        with self._lock:
+            self.files[file_obj["id"]] = (file_obj, content)
+        return file_obj
+
+    def create_batch(self, body: dict) -> dict | None:
+        """Create a batch over an uploaded input file and start processing it."""
+        input_file_id = body.get("input_file_id")
+        if input_file_id not in self.files:
+            return None
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex[:24]}",
+            "object": "batch",
+            "endpoint": body.get("endpoint", "/v1/chat/completions"),
+            "errors": None,
+            "input_file_id": input_file_id,
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "validating",
+            "output_file_id": None,
+            "error_file_id": None,
+            "created_at": int(time.time()),
+            "in_progress_at": None,
+            "completed_at": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "metadata": body.get("metadata"),
+        }
+        with self._lock:
+            self.batches[batch["id"]] = batch
+        threading.Thread(target=self._run_batch, args=(batch["id"],), daemon=True).start()
+        return batch
+
+    def get_batch(self, batch_id: str) -> dict | None:
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            return json.loads(json.dumps(batch)) if batch else None
+
+    def _run_batch(self, batch_id: str):
+        """Answer every line of a batch input file, writing output and error files."""
+        batch = self.batches[batch_id]
+        _, content = self.files[batch["input_file_id"]]
+        lines = [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+        with self._lock:
+            batch["status"] = "in_progress"
+            batch["in_progress_at"] = int(time.time())
+            batch["request_counts"]["total"] = len(lines)
+
+        outputs, errors = [], []
+        for line in lines:
+            time.sleep(self.config.batch_ms / 1000.0)
+            result = {
+                "id": f"batch_req_{uuid.uuid4().hex[:24]}",
+                "custom_id": line.get("custom_id"),
+                "error": None,
+            }
+            with self._lock:
+                failed = self._rng.random() < self.config.error_rate
+            if failed:
+                result["response"] = {
+                    "status_code": 500,
+                    "request_id": uuid.uuid4().hex,
+                    "body": {"error": {"message": "Injected mock server error", "type": "server_error"}},
+                }
+                errors.append(result)
+            else:
+                result["response"] = {
+                    "status_code": 200,
+                    "request_id": uuid.uuid4().hex,
+                    "body": self.completion(line.get("body") or {}),
+                }
+                outputs.append(result)
+            with self._lock:
+                batch["request_counts"]["failed" if failed else "completed"] += 1
+
+        def to_file(results: list[dict], kind: str) -> str | None:
+            if not results:
+                return None
+            data = "".join(json.dumps(r) + "\n" for r in results).encode("utf-8")
+            return self.create_file(f"{batch_id}_{kind}.jsonl", "batch_output", data)["id"]
+
+        output_file_id = to_file(outputs, "output")
+        error_file_id = to_file(errors, "error")
+        with self._lock:
+            batch["status"] = "completed"
+            batch["output_file_id"] = output_file_id
+            batch["error_file_id"] = error_file_id
+            batch["completed_at"] = int(time.time())
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict:
+    """Parse a multipart/form-data body into {field: (filename, bytes)}."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = (part.get_filename(), part.get_payload(decode=True))
+    return fields
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """HTTP front end; the backend is attached to the server instance."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real providers
+    disable_nagle_algorithm = True  # small SSE chunks must not wait for ACKs
+
+    def log_message(self, format, *args):
+        pass  # keep load-test output clean
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, events):
+        """Send (delay, payload) events as server-sent events over chunked encoding."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write(data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        for delay, payload in events:
+            if delay:
+                time.sleep(delay)
+            write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        write(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length)
+
+    def _read_json(self) -> dict:
+        return json.loads(self._read_body() or b"{}")
+
+    def _not_found(self):
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_GET(self):
+        backend = self.server.backend
+        parts = self.path.rstrip("/").split("/")[1:]
+        if parts == ["v1", "models"]:
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-chat", "object": "model"}]})
+        elif len(parts) == 3 and parts[:2] == ["v1", "batches"]:
+            batch = backend.get_batch(parts[2])
+            if batch:
+                self._send_json(200, batch)
+            else:
+                self._not_found()
+        elif len(parts) in (3, 4) and parts[:2] == ["v1", "files"] and parts[2] in backend.files:
+            file_obj, content = backend.files[parts[2]]
+            if len(parts) == 3:
+                self._send_json(200, file_obj)
+            elif parts[3] == "content":
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+            else:
+                self._not_found()
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        path = self.path.rstrip("/")
+        if path == "/v1/files":
+            self._upload_file()
+        elif path == "/v1/batches":
+            batch = self.server.backend.create_batch(self._read_json())
+            if batch is None:
+                self._send_json(400, {"error": {"message": "Unknown input_file_id", "type": "invalid_request_error"}})
+            else:
+                self._send_json(200, batch)
+        elif path == "/v1/chat/completions":
+            self._chat_completion()
+        else:
+            self._not_found()
+
+    def _upload_file(self):
+        fields = parse_multipart(self.headers.get("Content-Type", ""), self._read_body())
+        if "file" not in fields:
+            self._send_json(400, {"error": {"message": "Missing file", "type": "invalid_request_error"}})
+            return
+        filename, content = fields["file"]
+        purpose = (fields.get("purpose") or (None, b"batch"))[1].decode("utf-8")
+        self._send_json(200, self.server.backend.create_file(filename or "upload.jsonl", purpose, content))
+
+    def _chat_completion(self):
+        backend = self.server.backend
+        body = self._read_json()
+        status, retry_after = backend.admit()
+        # Rejections come back fast; real work takes the sampled latency
+        # (time to first token), plus decode time per token for blocking calls
+        latency = backend.sample_latency()
+        time.sleep(latency if status != 429 else latency / 10)
+        stream = bool(body.get("stream"))
+        if status == 429:
+            self._send_json(
+                429,
+                {"error": {
+                    "message": f"Rate limit reached. Please try again in {retry_after:.2f}s.",
+                    "type": "rate_limit_exceeded",
+                }},
+                headers={"Retry-After": f"{retry_after:.2f}"},
+            )
+        elif status != 200:
+            self._send_json(status, {"error": {"message": "Injected mock server error", "type": "server_error"}})
+        elif stream:
+            self._send_stream(backend.stream_chunks(body))
+        else:
+            completion = backend.completion(body)
+            time.sleep(completion["usage"]["completion_tokens"] * backend.config.token_ms / 1000.0)
+            self._send_json(200, completion)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig):
+        super().__init__(address, MockHandler)
+        self.backend = MockBackend(config)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_server(config: MockConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    """Start a mock server on a background thread (port 0 = pick a free port)."""
+    server = MockServer((host, port), config or MockConfig.from_env())
+    thread = threading.Thread(target=server.serve_forever, name="mock-provider", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible mock LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread (0 = fixed)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of an injected 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds on 429s")
+    parser.add_argument("--rpm-limit", type=int, default=None, help="Hard requests-per-minute ceiling")
+    parser.add_argument("--answer-words", type=int, default=80, help="Mean answer length in words")
+    parser.add_argument("--answer-words-sd", type=float, default=30.0)
+    parser.add_argument("--token-ms", type=float, default=5.0, help="Decode time per generated token")
+    parser.add_argument("--batch-ms", type=float, default=2.0, help="Processing time per batch request")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        rpm_limit=args.rpm_limit,
+        answer_words=args.answer_words,
+        answer_words_sd=args.answer_words_sd,
+        token_ms=args.token_ms,
+        batch_ms=args.batch_ms,
+        seed=args.seed,
+    )
+    server = MockServer((args.host, args.port), config)
+    print(f"🧪 Mock provider listening on {server.base_url}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n  Stats: {server.backend.stats}")
+
+
+if __name__ == "__main__":
+    main()
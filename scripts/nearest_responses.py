@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Nearest Responses
+==================
+Finds the responses closest in meaning to a given one (or to free text)
+across all models and languages, and flags likely mistranslations: a
+response that is more similar to a *different* question's answer than to
+any answer to its own question in another language usually means that
+language's prompt asked something else.
+
+Embeddings come from the similarity stage's cache, so only answers it has
+not seen are encoded. They are kept in a persistent vector index (see
+vector_index.py) under results/cache/index/, which is rebuilt whenever
+the set of responses changes. The index is exact for small corpora and
+switches to an IVF (clustered) layout for large ones.
+
+Usage:
+    python scripts/nearest_responses.py --model llama3-8b --question 12 --language kz
+    python scripts/nearest_responses.py --text "Astana is the capital of Kazakhstan" -k 5
+    python scripts/nearest_responses.py --mistranslations
+    python scripts/nearest_responses.py --mistranslations --models jais-30b --margin 0.05
+    python scripts/nearest_responses.py --rebuild      # Rebuild the index from scratch
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from crosslingual import LANG_NAMES, discover_models
+from crosslingual.lazy import lazy_import
+from crosslingual.store import write_table
+from embedding_cache import EmbeddingCache, text_hash
+from encoders import BACKENDS
+from similarity_analysis import (
+    EMBEDDING_CACHE_DIR,
+    encode_texts,
+    encoder_cache_name,
+    load_answers,
+    load_model,
+)
+from vector_index import NPROBE, QUERY_CHUNK, VectorIndex
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+tqdm = lazy_import("tqdm")
+
+# ---------------------------------------------------------------------------
+# Paths
+# ---------------------------------------------------------------------------
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+INDEX_DIR = ROOT_DIR / "results" / "cache" / "index"
+MISTRANSLATION_CSV = ROOT_DIR / "results" / "mistranslation_candidates.csv"
+
+# Neighbours inspected per response when looking for another question's answer
+SCAN_NEIGHBOURS = 10
+
+# Columns of the mistranslation table, also written when nothing is flagged
+CANDIDATE_COLUMNS = [
+    "model", "question_id", "language", "sample_index",
+    "similar_model", "similar_question_id", "similar_language",
+    "similarity_other", "similarity_own", "own_language", "gap",
+]
+
+# Characters of each answer shown in listings
+PREVIEW_CHARS = 70
+
+
+def collect_answers() -> dict[tuple, str]:
+    """Every non-empty answer, keyed by (model, question_id, language, sample_index)."""
+    answers = {}
+    for model_key in discover_models():
+        responses, _ = load_answers(model_key)
+        for key, text in responses.items():
+            answers[(model_key, *key)] = text
+    return answers
+
+
+def answers_fingerprint(answers: dict[tuple, str]) -> str:
+    """Changes whenever a response is added, removed or edited."""
+    digest = hashlib.sha256()
+    for key, text in answers.items():
+        digest.update(f"{key}\t{text_hash(text)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def open_index(
+    answers: dict[tuple, str],
+    backend: str = "torch",
+    rebuild: bool = False,
+    nprobe: int = NPROBE,
+) -> VectorIndex:
+    """Load the index for `backend`, (re)building it if `answers` changed."""
+    encoder_name = encoder_cache_name(backend)
+    path = INDEX_DIR / re.sub(r"[^\w.-]+", "--", encoder_name)
+    fingerprint = answers_fingerprint(answers)
+    index = None if rebuild else VectorIndex.load(path)
+    if index is not None and index.meta.get("fingerprint") == fingerprint:
+        index.nprobe = nprobe
+        return index
+
+    print(f"  🧭 Building vector index over {len(answers)} responses...")
+    model = None
+
+    def encode(texts: list[str]):
+        # The encoder is only loaded once some answer is missing from the cache
+        nonlocal model
+        if model is None:
+            model = load_model(backend, None)
+        return encode_texts(model, texts)
+
+    # Whatever precision similarity_analysis.py stored the cache in
+    cache = EmbeddingCache(EMBEDDING_CACHE_DIR, encoder_name, dtype=None)
+    vectors = cache.embed(list(answers.values()), encode)
+    index = VectorIndex.build(
+        vectors, list(answers), nprobe=nprobe,
+        meta={"encoder": encoder_name, "fingerprint": fingerprint},
+    )
+    index.save(path)
+    print(f"  💾 {index.kind} index of {len(index)} vectors saved to {path}")
+    return index
+
+
+def nearest(index: VectorIndex, query, k: int = 10, exclude: tuple | None = None) -> list[tuple]:
+    """The k (key, similarity) pairs closest to a query vector, skipping `exclude`."""
+    scores, rows = index.search(query, k + (exclude is not None))
+    hits = [(index.keys[row], float(score)) for score, row in zip(scores, rows)]
+    return [(key, score) for key, score in hits if key != exclude][:k]
+
+
+def find_mistranslations(
+    index: VectorIndex,
+    model_keys: list[str] | None = None,
+    margin: float = 0.0,
+    neighbours: int = SCAN_NEIGHBOURS,
+) -> pd.DataFrame:
+    """
+    Responses whose nearest answer to a different question beats, by more
+    than `margin`, their best match among answers to the same question in
+    other languages (any model). Sorted by that gap, largest first.
+    """
+    by_question = defaultdict(list)
+    for row, key in enumerate(index.keys):
+        by_question[key[1]].append(row)
+    candidates = np.array([
+        row for row, key in enumerate(index.keys)
+        if model_keys is None or key[0] in model_keys
+    ], dtype=np.intp)
+
+    flagged = []
+    chunks = range(0, len(candidates), QUERY_CHUNK)
+    for start in tqdm.tqdm(chunks, desc="  Scanning", unit="chunk", disable=len(chunks) < 2):
+        batch = candidates[start:start + QUERY_CHUNK]
+        scores, rows = index.search(index.vectors[batch], neighbours + 1)
+        for row, row_scores, row_neighbours in zip(batch, scores, rows):
+            model_key, qid, lang, sample = index.keys[row]
+            other = next(
+                ((score, n) for score, n in zip(row_scores, row_neighbours)
+                 if n >= 0 and index.keys[n][1] != qid),
+                None,
+            )
+            own = [n for n in by_question[qid] if index.keys[n][2] != lang]
+            if other is None or not own:
+                continue
+            own_sims = index.vectors[own] @ index.vectors[row]
+            best_own = int(np.argmax(own_sims))
+            gap = float(other[0] - own_sims[best_own])
+            if gap <= margin:
+                continue
+            similar = index.keys[other[1]]
+            flagged.append({
+                "model": model_key,
+                "question_id": qid,
+                "language": lang,
+                "sample_index": sample,
+                "similar_model": similar[0],
+                "similar_question_id": similar[1],
+                "similar_language": similar[2],
+                "similarity_other": round(float(other[0]), 4),
+                "similarity_own": round(float(own_sims[best_own]), 4),
+                "own_language": index.keys[own[best_own]][2],
+                "gap": round(gap, 4),
+            })
+
+    df = pd.DataFrame(flagged, columns=CANDIDATE_COLUMNS)
+    return df.sort_values("gap", ascending=False, kind="stable")
+
+
+def _preview(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS - 1] + "…"
+
+
+def print_neighbours(hits: list[tuple], answers: dict[tuple, str], question_id: int | None = None):
+    print(f"\n  {'#':>3} {'Sim':>7}  {'Model':<14} {'Q':>5} {'Lang':<5} Answer")
+    print(f"  {'─'*100}")
+    for rank, (key, score) in enumerate(hits, 1):
+        model_key, qid, lang, sample = key
+        marker = "=" if qid == question_id else " "
+        sample_tag = f"#{sample}" if sample else ""
+        print(f"  {rank:>3} {score:>7.4f}  {model_key:<14} {marker}{qid:>4} "
+              f"{lang + sample_tag:<5} {_preview(answers[key])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find semantically nearest responses and likely mistranslations"
+    )
+    parser.add_argument("--model", help="Model key of the response to look up")
+    parser.add_argument("--question", type=int, help="Question ID of the response")
+    parser.add_argument("--language", help="Language of the response (en, ru, zh, kz)")
+    parser.add_argument(
+        "--sample", type=int, default=0,
+        help="Sample index of the response (default: 0)",
+    )
+    parser.add_argument("--text", help="Free text to search for instead of a stored response")
+    parser.add_argument(
+        "-k", "--top", type=int, default=10,
+        help="Number of neighbours to show (default: 10)",
+    )
+    parser.add_argument(
+        "--mistranslations", action="store_true",
+        help="List responses closer to another question's answer than to their own",
+    )
+    parser.add_argument(
+        "--models", nargs="+", default=None,
+        help="Models whose responses are scanned with --mistranslations (default: all)",
+    )
+    parser.add_argument(
+        "--margin", type=float, default=0.0,
+        help="Minimum similarity gap for a mistranslation candidate (default: 0)",
+    )
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default="torch",
+        help="Encoder whose embeddings are indexed (default: torch)",
+    )
+    parser.add_argument(
+        "--nprobe", type=int, default=NPROBE,
+        help=f"Clusters searched per query on large (IVF) indexes (default: {NPROBE})",
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Rebuild the index even if responses are unchanged",
+    )
+    args = parser.parse_args()
+
+    lookup = args.model is not None or args.question is not None or args.language is not None
+    if lookup and None in (args.model, args.question, args.language):
+        parser.error("--model, --question and --language are needed together")
+
+    print(f"\n{'='*60}")
+    print(f"  Nearest Responses")
+    print(f"{'='*60}\n")
+
+    answers = collect_answers()
+    if not answers:
+        print("❌ No response files found. Run query_llms.py first.")
+        return
+    index = open_index(answers, args.backend, args.rebuild, args.nprobe)
+    print(f"  Index: {index.kind}, {len(index)} responses")
+
+    if lookup:
+        key = (args.model, args.question, args.language, args.sample)
+        row = index.row(key)
+        if row is None:
+            print(f"\n❌ No answer for {args.model} Q{args.question} ({args.language}).")
+            return
+        lang_name = LANG_NAMES.get(args.language, args.language)
+        print(f"\n  🔎 {args.model} Q{args.question} ({lang_name}): {_preview(answers[key])}")
+        hits = nearest(index, index.vectors[row], args.top, exclude=key)
+        print_neighbours(hits, answers, args.question)
+        print(f"\n  (= marks answers to the same question)")
+
+    if args.text:
+        print(f"\n  🔎 \"{_preview(args.text)}\"")
+        query = encode_texts(load_model(args.backend, None), [args.text])[0]
+        print_neighbours(nearest(index, query, args.top), answers)
+
+    if args.mistranslations:
+        df = find_mistranslations(index, args.models, args.margin)
+        # Written even when empty, so results of an earlier scan do not linger
+        store_path = write_table("mistranslation_candidates", df, MISTRANSLATION_CSV)
+        if df.empty:
+            print("\n✅ No response is closer to another question's answer than to its own.")
+        else:
+            print(f"\n  ⚠️  {len(df)} possible mistranslations "
+                  f"(closer to another question's answer than to their own)")
+            print(f"\n  {'Model':<14} {'Q':>5} {'Lang':<5} {'→ Q':>5} {'Other':>7} "
+                  f"{'Own':>7} {'Gap':>7}")
+            print(f"  {'─'*55}")
+            for row in df.head(15).itertuples(index=False):
+                print(f"  {row.model:<14} {row.question_id:>5} {row.language:<5} "
+                      f"{row.similar_question_id:>5} {row.similarity_other:>7.4f} "
+                      f"{row.similarity_own:>7.4f} {row.gap:>7.4f}")
+            print(f"\n  📁 Candidates saved to: {store_path or MISTRANSLATION_CSV}")
+
+    if not (lookup or args.text or args.mistranslations):
+        print("\n  Index is up to date. Pass --model/--question/--language, --text "
+              "or --mistranslations to query it.")
+
+    print()
+
+
+if __name__ == "__main__":
+    main()
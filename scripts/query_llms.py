@@ -3,26 +3,57 @@
 Cross-Lingual LLM Query Engine
 ===============================
 Batch-queries multiple LLMs with multilingual questions via free API tiers.
-Supports: Groq (Llama 3, Gemma 2), Google Gemini (free tier), Ollama (local).
+Supports: Groq (Llama 3, Gemma 2), Google Gemini (free tier), Ollama (local),
+and a built-in mock provider for offline load testing.
 
 Usage:
     python scripts/query_llms.py                    # Full run
     python scripts/query_llms.py --dry-run          # Validate config only
     python scripts/query_llms.py --models llama3    # Specific model
     python scripts/query_llms.py --languages en ru  # Specific languages
+    python scripts/query_llms.py --concurrency 8    # Async fan-out across models
+    python scripts/query_llms.py --no-cache         # Bypass the response cache
+    python scripts/query_llms.py --concurrency 8 --http2  # Multiplex over HTTP/2
+    python scripts/query_llms.py --models mock --concurrency 32  # Offline load test
+    python scripts/query_llms.py --samples 5        # 5 completions per prompt
+    python scripts/query_llms.py --stream           # Record TTFT and tokens/sec
+    python scripts/query_llms.py --batch            # Submit via the provider Batch API
+    python scripts/query_llms.py --db               # Also keep responses in SQLite
 """
 
 import json
+import math
 import os
 import sys
 import time
 import argparse
+import functools
 import hashlib
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 from dotenv import load_dotenv
-from tqdm import tqdm
+
+from rate_limiter import (
+    CHARS_PER_TOKEN,
+    DEFAULT_COMPLETION_TOKENS,
+    ProviderLimiter,
+    parse_rate_limit_error,
+)
+from response_cache import ResponseCache
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from crosslingual import LANGUAGES, RESPONSES_DIR, response_path
+from crosslingual.database import DB_PATH, ResponseDB, open_database
+from crosslingual.journal import ResponseJournal, write_json_atomic
+from crosslingual.lazy import lazy_import
+from crosslingual.reader import iter_responses, read_header
+
+asyncio = lazy_import("asyncio")
+tqdm = lazy_import("tqdm")
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -30,9 +61,7 @@ from tqdm import tqdm
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 DATA_FILE = ROOT_DIR / "data" / "questions_multilingual.json"
-RESPONSES_DIR = ROOT_DIR / "results" / "responses"
-
-LANGUAGES = ["en", "ru", "zh", "kz"]
+CACHE_FILE = ROOT_DIR / "results" / "cache" / "responses.sqlite"
 
 # Model configurations: (provider, model_id, display_name)
 MODEL_CONFIGS = {
@@ -46,15 +75,50 @@ MODEL_CONFIGS = {
         "model_id": "llama-3.3-70b-versatile",
         "display_name": "Llama 3.3 70B (Groq)",
     },
-
-
+    # Local stand-in (scripts/mock_provider.py); never part of the default run
+    "mock": {
+        "provider": "mock",
+        "model_id": "mock-chat",
+        "display_name": "Mock Chat (local)",
+    },
 }
 
 # System prompt — deliberately neutral to avoid biasing responses
 SYSTEM_PROMPT = "You are a helpful assistant. Answer the question directly and concisely."
 
+# Sampling parameters
+TEMPERATURE = 0.3  # Low temp for more deterministic responses
+MAX_TOKENS = 1024
+
 # Rate limiting (requests per minute)
-RATE_LIMITS = {"groq": 28, "gemini": 14, "ollama": 999}  # slightly under actual limits
+RATE_LIMITS = {"groq": 28, "gemini": 14, "ollama": 999, "mock": 600}  # slightly under actual limits
+
+# Token budgets (tokens per minute); None means the provider has no token limit
+TOKEN_LIMITS = {"groq": 5500, "gemini": 950_000, "ollama": None, "mock": None}
+
+# Providers that speak the OpenAI chat-completions API
+OPENAI_COMPATIBLE = ("groq", "ollama", "mock")
+
+# Providers that return several completions for one prompt in one round trip
+# (`n` / `candidate_count`); others get one parallel request per sample
+NATIVE_N_PROVIDERS = ("gemini", "mock")
+
+# Per-entry timing fields recorded in streaming mode
+STREAM_FIELDS = ("ttft_seconds", "tokens_per_second", "itl_ms")
+
+# Providers with an OpenAI-compatible Batch API (/v1/files + /v1/batches)
+BATCH_PROVIDERS = ("groq", "mock")
+
+# Seconds between batch status polls
+BATCH_POLL_SECONDS = 30
+
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Retries per query after a rate-limit error before the error is recorded
+MAX_RATE_LIMIT_RETRIES = 4
+
+# Default size bound of the on-disk response cache
+CACHE_MAX_MB = 512
 
 
 def load_questions() -> list[dict]:
@@ -63,16 +127,67 @@ def load_questions() -> list[dict]:
         return json.load(f)
 
 
-def create_client(provider: str):
-    """Create API client for the given provider."""
+def request_key(
+    provider: str,
+    model_id: str,
+    question: str,
+    system_prompt: str | None = None,
+    temperature: float | None = None,
+    max_tokens: int | None = None,
+    sample_index: int = 0,
+) -> str:
+    """
+    Content address of a request: a hash of everything that determines the answer.
+
+    Samples beyond the first are distinct cache entries; sample 0 keeps the
+    same key as a single-sample run.
+    """
+    payload = {
+        "provider": provider,
+        "model_id": model_id,
+        "system_prompt": SYSTEM_PROMPT if system_prompt is None else system_prompt,
+        "temperature": TEMPERATURE if temperature is None else temperature,
+        "max_tokens": MAX_TOKENS if max_tokens is None else max_tokens,
+        "question": question,
+    }
+    if sample_index:
+        payload["sample_index"] = sample_index
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def create_http_client(sdk_module, pool_size: int, http2: bool):
+    """Build a keep-alive httpx client with a bounded connection pool for an SDK."""
+    import httpx
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("   ⚠️  HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+    limits = httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=60.0,
+    )
+    # Prefer the SDK's own httpx subclass so its timeout/redirect defaults still apply
+    client_class = getattr(sdk_module, "DefaultHttpxClient", httpx.Client)
+    return client_class(limits=limits, http2=http2)
+
+
+def create_client(provider: str, pool_size: int | None = None, http2: bool = False):
+    """
+    Create API client for the given provider.
+
+    With `pool_size`, OpenAI-compatible SDKs get an explicit keep-alive
+    connection pool of that size (optionally HTTP/2) instead of their default.
+    """
     if provider == "groq":
-        from groq import Groq
+        import groq
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key or api_key.startswith("your_"):
             raise ValueError(
                 "GROQ_API_KEY not set. Get a free key at https://console.groq.com"
             )
-        return Groq(api_key=api_key)
+        http_client = create_http_client(groq, pool_size, http2) if pool_size else None
+        return groq.Groq(api_key=api_key, http_client=http_client)
 
     elif provider == "gemini":
         import google.generativeai as genai
@@ -81,121 +196,866 @@ def create_client(provider: str):
             raise ValueError(
                 "GEMINI_API_KEY not set. Get a free key at https://aistudio.google.com/apikey"
             )
+        # The SDK keeps one gRPC (HTTP/2) channel per process; models are cached below
         genai.configure(api_key=api_key)
-        return genai  # return the module; model is instantiated per-call
+        return genai
 
     elif provider == "ollama":
-        from openai import OpenAI
+        import openai
         base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        return OpenAI(base_url=f"{base_url}/v1", api_key="ollama")
+        http_client = create_http_client(openai, pool_size, http2) if pool_size else None
+        return openai.OpenAI(base_url=f"{base_url}/v1", api_key="ollama", http_client=http_client)
+
+    elif provider == "mock":
+        import openai
+        base_url = os.getenv("MOCK_BASE_URL") or start_embedded_mock_server()
+        http_client = create_http_client(openai, pool_size, http2) if pool_size else None
+        # SDK retries would hide injected 429s from our own limiter
+        return openai.OpenAI(
+            base_url=f"{base_url}/v1", api_key="mock", http_client=http_client, max_retries=0
+        )
 
     else:
         raise ValueError(f"Unknown provider: {provider}")
 
 
-def query_model(client, provider: str, model_id: str, question: str) -> dict:
-    """Send a single question to a model and return response metadata."""
-    start_time = time.time()
+@functools.lru_cache(maxsize=None)
+def start_embedded_mock_server() -> str:
+    """Start the in-process mock provider (configured from MOCK_* env vars) once."""
+    from mock_provider import start_server
+    server = start_server()
+    print(f"   🧪 Embedded mock provider at {server.base_url}")
+    return server.base_url
+
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_model(
+    model_id: str,
+    system_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    candidate_count: int = 1,
+):
+    """Return a cached GenerativeModel for one (model_id, generation config)."""
+    import google.generativeai as genai
+    return genai.GenerativeModel(
+        model_name=model_id,
+        system_instruction=system_prompt,
+        generation_config=genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+            candidate_count=candidate_count,
+        ),
+    )
+
+
+class ClientPool:
+    """
+    Shares one SDK client (and its connection pool) per provider.
+
+    Models that live on the same provider reuse the same keep-alive
+    connections instead of each opening their own, which keeps TLS
+    handshakes and client setup off the per-request path.
+    """
+
+    def __init__(self, pool_size: int, http2: bool = False):
+        self.pool_size = pool_size
+        self.http2 = http2
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str):
+        """Return the shared client for a provider, creating it on first use."""
+        with self._lock:
+            if provider not in self._clients:
+                self._clients[provider] = create_client(provider, self.pool_size, self.http2)
+            return self._clients[provider]
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                close = getattr(client, "close", None)
+                if callable(close):
+                    close()
+            self._clients.clear()
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def stream_timing(start: float, token_times: list[float], completion_tokens: int, end: float) -> dict:
+    """
+    Time-to-first-token, inter-token latency percentiles and decode throughput.
+
+    `token_times` are perf_counter() stamps of each content chunk; for Gemini
+    a chunk carries several tokens, so its "inter-token" gaps are per chunk.
+    """
+    if not token_times:
+        return {"ttft_seconds": None, "tokens_per_second": None, "itl_ms": None}
+    first = token_times[0]
+    gaps = [(b - a) * 1000 for a, b in zip(token_times, token_times[1:])]
+    decode = end - first
+    return {
+        "ttft_seconds": round(first - start, 3),
+        "tokens_per_second": (
+            round((completion_tokens - 1) / decode, 2)
+            if decode > 0 and completion_tokens > 1 else None
+        ),
+        "itl_ms": {f"p{q}": round(percentile(gaps, q), 2) for q in (50, 90, 99)} if gaps else None,
+    }
+
+
+def stream_chat_completion(client, model_id: str, question: str, start: float) -> tuple:
+    """Stream an OpenAI-compatible chat completion; return (answers, usage, timing)."""
+    stream = client.chat.completions.create(
+        model=model_id,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": question},
+        ],
+        temperature=TEMPERATURE,
+        max_tokens=MAX_TOKENS,
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    pieces = []
+    token_times = []
+    final_usage = None
+    for chunk in stream:
+        if chunk.choices:
+            content = chunk.choices[0].delta.content
+            if content:
+                token_times.append(time.perf_counter())
+                pieces.append(content)
+        # OpenAI/Ollama send usage on the last chunk; Groq also nests it in x_groq
+        chunk_usage = getattr(chunk, "usage", None) or getattr(
+            getattr(chunk, "x_groq", None), "usage", None
+        )
+        if chunk_usage:
+            final_usage = chunk_usage
+    end = time.perf_counter()
+
+    if final_usage is not None:
+        usage = {
+            "prompt_tokens": getattr(final_usage, "prompt_tokens", 0),
+            "completion_tokens": getattr(final_usage, "completion_tokens", 0),
+            "total_tokens": getattr(final_usage, "total_tokens", 0),
+        }
+    else:
+        # No usage reported: one content chunk is one token for these providers
+        usage = {"prompt_tokens": 0, "completion_tokens": len(token_times), "total_tokens": len(token_times)}
+    timing = stream_timing(start, token_times, usage["completion_tokens"], end)
+    return ["".join(pieces)], usage, timing
+
+
+def stream_gemini(model, question: str, start: float) -> tuple:
+    """Stream a Gemini completion; return (answers, usage, timing)."""
+    response = model.generate_content(question, stream=True)
+    pieces = []
+    token_times = []
+    for chunk in response:
+        text = "".join(part.text for part in chunk.parts)
+        if text:
+            token_times.append(time.perf_counter())
+            pieces.append(text)
+    end = time.perf_counter()
+    usage = {
+        "prompt_tokens": getattr(response.usage_metadata, "prompt_token_count", 0),
+        "completion_tokens": getattr(response.usage_metadata, "candidates_token_count", 0),
+        "total_tokens": getattr(response.usage_metadata, "total_token_count", 0),
+    }
+    timing = stream_timing(start, token_times, usage["completion_tokens"], end)
+    return ["".join(pieces)], usage, timing
+
+
+def query_model(
+    client, provider: str, model_id: str, question: str, n: int = 1, stream: bool = False
+) -> dict:
+    """
+    Send a single question to a model and return response metadata.
+
+    With n > 1 (NATIVE_N_PROVIDERS only) the provider returns n completions;
+    they are listed in "answers" and "answer" holds the first one. With
+    `stream` (n must be 1) the reply is streamed and STREAM_FIELDS are added.
+    """
+    start_time = time.perf_counter()
+    timing = {}
 
     try:
-        if provider in ("groq", "ollama"):
+        if provider in OPENAI_COMPATIBLE and stream:
+            answers, usage, timing = stream_chat_completion(client, model_id, question, start_time)
+        elif provider in OPENAI_COMPATIBLE:
+            extra = {"n": n} if n > 1 else {}
             response = client.chat.completions.create(
                 model=model_id,
                 messages=[
                     {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": question},
                 ],
-                temperature=0.3,  # Low temp for more deterministic responses
-                max_tokens=1024,
+                temperature=TEMPERATURE,
+                max_tokens=MAX_TOKENS,
+                **extra,
             )
-            answer = response.choices[0].message.content
+            answers = [choice.message.content for choice in response.choices]
             usage = {
                 "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
                 "completion_tokens": getattr(response.usage, "completion_tokens", 0),
                 "total_tokens": getattr(response.usage, "total_tokens", 0),
             }
         elif provider == "gemini":
-            import google.generativeai as genai
-            model = genai.GenerativeModel(
-                model_name=model_id,
-                system_instruction=SYSTEM_PROMPT,
-                generation_config=genai.GenerationConfig(temperature=0.3, max_output_tokens=1024),
-            )
-            response = model.generate_content(question)
-            answer = response.text
-            usage = {
-                "prompt_tokens": getattr(response.usage_metadata, "prompt_token_count", 0),
-                "completion_tokens": getattr(response.usage_metadata, "candidates_token_count", 0),
-                "total_tokens": getattr(response.usage_metadata, "total_token_count", 0),
-            }
+            model = get_gemini_model(model_id, SYSTEM_PROMPT, TEMPERATURE, MAX_TOKENS, n)
+            if stream:
+                answers, usage, timing = stream_gemini(model, question, start_time)
+            else:
+                answers, usage = gemini_answers(model, question, n)
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
 
         return {
-            "answer": answer,
+            "answer": answers[0],
+            "answers": answers,
             "usage": usage,
             "latency_seconds": round(elapsed, 3),
             "error": None,
+            "rate_limited": False,
+            "retry_after": None,
+            **timing,
         }
 
     except Exception as e:
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
+        rate_limited, retry_after = parse_rate_limit_error(e)
         return {
             "answer": None,
+            "answers": [],
             "usage": {},
             "latency_seconds": round(elapsed, 3),
             "error": str(e),
+            "rate_limited": rate_limited,
+            "retry_after": retry_after,
         }
 
 
+def gemini_answers(model, question: str, n: int) -> tuple:
+    """Run a non-streaming Gemini call; return (answers, usage)."""
+    response = model.generate_content(question)
+    if n == 1:
+        answers = [response.text]
+    else:
+        answers = [
+            "".join(part.text for part in candidate.content.parts)
+            for candidate in response.candidates
+        ]
+    usage = {
+        "prompt_tokens": getattr(response.usage_metadata, "prompt_token_count", 0),
+        "completion_tokens": getattr(response.usage_metadata, "candidates_token_count", 0),
+        "total_tokens": getattr(response.usage_metadata, "total_token_count", 0),
+    }
+    return answers, usage
+
+
+def create_limiter(provider: str) -> ProviderLimiter:
+    """Create the shared RPM/TPM limiter for a provider."""
+    return ProviderLimiter(RATE_LIMITS.get(provider, 30), TOKEN_LIMITS.get(provider))
+
+
+def settle_result(limiter: ProviderLimiter, estimated_tokens: int, result: dict, attempt: int) -> bool:
+    """Feed a query result back into the limiter; return True if it should be retried."""
+    if result["error"] is None:
+        limiter.record_usage(estimated_tokens, result["usage"], choices=len(result["answers"]))
+        return False
+    limiter.record_failure(estimated_tokens)
+    if result["rate_limited"] and attempt < MAX_RATE_LIMIT_RETRIES:
+        limiter.record_rate_limit(result["retry_after"])
+        return True
+    return False
+
+
+def query_with_limits(
+    limiter: ProviderLimiter,
+    client,
+    provider: str,
+    model_id: str,
+    question: str,
+    n: int = 1,
+    stream: bool = False,
+) -> dict:
+    """Query a model under the provider's limiter, retrying rate-limit errors with backoff."""
+    estimated = limiter.estimate_tokens(SYSTEM_PROMPT + question, n)
+    attempt = 0
+    while True:
+        time.sleep(limiter.reserve(estimated))
+        result = query_model(client, provider, model_id, question, n, stream)
+        if not settle_result(limiter, estimated, result, attempt):
+            return result
+        attempt += 1
+
+
 def get_response_path(model_key: str) -> Path:
     """Get the output file path for a model's responses."""
-    return RESPONSES_DIR / f"{model_key}_responses.json"
+    return response_path(model_key)
 
 
-def load_existing_responses(model_key: str) -> dict:
-    """Load existing responses for resume capability."""
+def get_journal_path(model_key: str) -> Path:
+    """Get the write-ahead journal path for a model's in-progress responses."""
+    return RESPONSES_DIR / f"{model_key}_responses.journal.jsonl"
+
+
+def get_ledger_path(model_key: str) -> Path:
+    """Get the append-only retry ledger holding a model's failed attempts."""
+    return RESPONSES_DIR / f"{model_key}_responses.retries.jsonl"
+
+
+def get_batch_state_path(model_key: str) -> Path:
+    """Get the state file of a model's submitted but not yet ingested batch."""
+    return RESPONSES_DIR / f"{model_key}_responses.batch.json"
+
+
+def load_compacted_responses(model_key: str) -> tuple[dict, list[dict]]:
+    """
+    Header and entries of a model's compacted responses, taken from the
+    response database when it is current for the model, else from the JSON.
+    """
     path = get_response_path(model_key)
-    if path.exists():
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Build lookup: (question_id, language) -> response
-            lookup = {}
-            for entry in data.get("responses", []):
-                # Retry if previous attempt failed
-                if entry.get("error"):
-                    continue
-                key = (entry["question_id"], entry["language"])
-                lookup[key] = entry
-            return lookup
-    return {}
+    db = open_database()
+    if db is not None:
+        with db:
+            if db.is_current(model_key, path):
+                return db.header(model_key), list(db.iter_entries(model_key))
+    if not path.exists():
+        return {}, []
+    return read_header(path), list(iter_responses(path))
 
 
-def save_responses(model_key: str, model_config: dict, responses: list[dict]):
-    """Save responses to JSON file."""
-    RESPONSES_DIR.mkdir(parents=True, exist_ok=True)
-    output = {
+def read_saved_responses(model_key: str) -> list[dict]:
+    """Read compacted responses followed by any journaled ones, oldest first."""
+    header, entries = load_compacted_responses(model_key)
+    for entry in entries:
+        if "request_key" not in entry and entry.get("question"):
+            # Legacy entries: derive the key from the file-level request settings
+            entry["request_key"] = request_key(
+                header.get("provider"), header.get("model_id"), entry["question"],
+                system_prompt=header.get("system_prompt", SYSTEM_PROMPT),
+            )
+    entries.extend(ResponseJournal(get_journal_path(model_key)).replay())
+    return entries
+
+
+def load_existing_responses(model_key: str) -> dict:
+    """
+    Load successful responses (compacted file + journal) for resume capability.
+
+    Failed attempts live in the retry ledger, so they are never resumed.
+    Callers only resume an entry whose `request_key` matches the current
+    request, so a changed system prompt, sampling parameter or question
+    text triggers a re-query instead of a stale resume.
+    """
+    # Build lookup: (question_id, language, sample_index) -> response
+    lookup = {}
+    for entry in read_saved_responses(model_key):
+        if not entry.get("error"):
+            lookup[response_slot(entry)] = entry
+    return lookup
+
+
+def load_retry_ledger(model_key: str) -> dict:
+    """Count the logged failures of each (question_id, language, sample_index)."""
+    failures = {}
+    for entry in ResponseJournal(get_ledger_path(model_key)).replay():
+        slot = response_slot(entry)
+        failures[slot] = failures.get(slot, 0) + 1
+    return failures
+
+
+def compact_responses(model_key: str, model_config: dict) -> int:
+    """
+    Fold the journal into the response JSON (latest success per key wins).
+
+    Error entries left in the JSON by older runs are moved to the retry
+    ledger, so the response file only ever holds successful answers. This
+    runs even when nothing was journaled; the file is only rewritten if
+    there was something to fold in or move out.
+    """
+    journal = ResponseJournal(get_journal_path(model_key))
+    latest = {}
+    failures = []
+    for entry in read_saved_responses(model_key):
+        if entry.get("error"):
+            failures.append(entry)
+        else:
+            latest[response_slot(entry)] = entry
+    if not journal.path.exists() and not failures:
+        return 0
+    if failures:
+        ledger = ResponseJournal(get_ledger_path(model_key))
+        for entry in failures:
+            ledger.append(entry)
+        ledger.close()
+    responses = list(latest.values())
+    sort_responses(responses)
+    save_responses(model_key, model_config, responses)
+    journal.clear()
+    return len(responses)
+
+
+def response_header(model_config: dict) -> dict:
+    """File-level fields of a model's response file."""
+    return {
         "model": model_config["display_name"],
         "model_id": model_config["model_id"],
         "provider": model_config["provider"],
         "timestamp": datetime.now().isoformat(),
         "system_prompt": SYSTEM_PROMPT,
+    }
+
+
+def save_responses(model_key: str, model_config: dict, responses: list[dict]):
+    """
+    Atomically save responses to the JSON file and, when the response
+    database is in use, replace the model's rows in one transaction.
+    """
+    output = {
+        **response_header(model_config),
         "total_queries": len(responses),
         "responses": responses,
     }
     path = get_response_path(model_key)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    write_json_atomic(path, output)
+    db = open_database()
+    if db is not None:
+        with db:
+            db.replace_model(model_key, output, responses, path)
+
+
+def response_slot(entry: dict) -> tuple:
+    """Identity of a response: (question_id, language, sample_index)."""
+    return entry["question_id"], entry["language"], entry.get("sample_index", 0)
+
+
+def build_entry(
+    question: dict,
+    lang: str,
+    question_text: str,
+    result: dict,
+    key: str,
+    sample_index: int = 0,
+) -> dict:
+    """Combine a question and a query result into a response entry."""
+    entry = {
+        "question_id": question["id"],
+        "category": question["category"],
+        "language": lang,
+        "sample_index": sample_index,
+        "question": question_text,
+        "answer": result["answer"],
+        "usage": result["usage"],
+        "latency_seconds": result.get("latency_seconds"),
+        "error": result["error"],
+        "request_key": key,
+    }
+    for field in STREAM_FIELDS:
+        if result.get(field) is not None:
+            entry[field] = result[field]
+    if result.get("cache_hit"):
+        entry["cache_hit"] = True
+    return entry
+
+
+def split_samples(result: dict, n: int) -> list[dict]:
+    """Split an n-choice result into one result per sample."""
+    if n == 1:
+        return [result]
+    # Usage is billed per request; share it evenly so sums over samples stay correct
+    usage = {name: round(value / n) for name, value in result["usage"].items()}
+    answers = result["answers"]
+    samples = []
+    for i in range(n):
+        sample = {**result, "usage": usage, "answer": answers[i] if i < len(answers) else None}
+        if result["error"] is None and i >= len(answers):
+            sample["error"] = f"Provider returned {len(answers)} of {n} requested choices"
+        samples.append(sample)
+    return samples
+
+
+def build_group_entries(
+    question: dict, lang: str, question_text: str, result: dict, group: list[tuple[int, str]]
+) -> list[dict]:
+    """Turn the result of one request covering `group` samples into entries."""
+    return [
+        build_entry(question, lang, question_text, sample, key, sample_index)
+        for sample, (sample_index, key) in zip(split_samples(result, len(group)), group)
+    ]
+
+
+def is_resumable(existing: dict, question: dict, lang: str, sample_index: int, key: str) -> bool:
+    """True if a previous run already answered exactly this request."""
+    entry = existing.get((question["id"], lang, sample_index))
+    return entry is not None and entry.get("request_key") == key
+
+
+def plan_model_jobs(
+    existing: dict,
+    questions: list[dict],
+    languages: list[str],
+    provider: str,
+    model_id: str,
+    samples: int,
+) -> tuple[list[tuple], int]:
+    """
+    List the prompts one model still needs as (question, lang, text, pending),
+    where `pending` holds the (sample_index, request_key) pairs not yet answered.
+    Returns the jobs and the number of resumed samples.
+    """
+    jobs = []
+    skipped = 0
+    for question in questions:
+        for lang in languages:
+            question_text = question.get(lang)
+            if not question_text:
+                continue
+            pending = []
+            for sample_index in range(samples):
+                key = request_key(provider, model_id, question_text, sample_index=sample_index)
+                # Skip if already done (resume support)
+                if is_resumable(existing, question, lang, sample_index, key):
+                    skipped += 1
+                else:
+                    pending.append((sample_index, key))
+            if pending:
+                jobs.append((question, lang, question_text, pending))
+    return jobs, skipped
+
+
+def take_cached(
+    cache: ResponseCache | None,
+    question: dict,
+    lang: str,
+    question_text: str,
+    pending: list[tuple[int, str]],
+) -> tuple[list[dict], list[tuple[int, str]]]:
+    """Split pending samples into cache-hit entries and samples that still need a request."""
+    entries = []
+    remaining = []
+    for sample_index, key in pending:
+        result = cache.get(key) if cache else None
+        if result is None:
+            remaining.append((sample_index, key))
+        else:
+            entries.append(build_entry(question, lang, question_text, result, key, sample_index))
+    return entries, remaining
+
+
+def request_groups(
+    provider: str, pending: list[tuple[int, str]], stream: bool = False
+) -> list[list[tuple[int, str]]]:
+    """
+    Group samples into requests: one n-choice request where the provider
+    supports it (and we are not streaming), otherwise one request each.
+    """
+    if not pending:
+        return []
+    if provider in NATIVE_N_PROVIDERS and not stream:
+        return [pending]
+    return [[sample] for sample in pending]
+
+
+def record_entries(
+    journal: ResponseJournal,
+    ledger: ResponseJournal,
+    cache: ResponseCache | None,
+    entries: list[dict],
+):
+    """Cache and journal fresh successes; log failures to the retry ledger."""
+    for entry in entries:
+        if entry["error"] is not None:
+            ledger.append(entry)
+            continue
+        if cache and not entry.get("cache_hit"):
+            cache.put(entry["request_key"], entry)
+        # Each result is durable as soon as it is journaled
+        journal.append(entry)
+
+
+def count_errors(entries: list[dict]) -> int:
+    """Entries whose request failed; they go to the retry ledger, not the responses."""
+    return sum(1 for entry in entries if entry["error"] is not None)
+
+
+def store_entries(db: ResponseDB | None, model_key: str, model_config: dict, entries: list[dict]):
+    """Write fresh successes straight into the run's response database, when it is in use."""
+    successes = [entry for entry in entries if entry["error"] is None]
+    if db is not None and successes:
+        db.upsert_responses(model_key, response_header(model_config), successes)
+
+
+def mean_usage_tokens(existing: dict) -> dict:
+    """Mean total_tokens per language over a model's successful responses."""
+    sums = {}
+    for entry in existing.values():
+        total = (entry.get("usage") or {}).get("total_tokens")
+        if total:
+            lang_sum = sums.setdefault(entry["language"], [0, 0])
+            lang_sum[0] += total
+            lang_sum[1] += 1
+    return {lang: total / count for lang, (total, count) in sums.items()}
+
+
+def plan_run(
+    questions: list[dict],
+    model_keys: list[str],
+    languages: list[str],
+    samples: int = 1,
+    cache: ResponseCache | None = None,
+) -> dict:
+    """
+    Compute the exact pending work of every model before any request is sent.
+
+    Each plan holds the model's jobs (see plan_model_jobs) and counts of
+    resumed, cached, pending and previously failed samples. Estimated
+    tokens come from the model's past usage per language, falling back to
+    other models' usage in that language, then to the limiter's heuristic.
+    """
+    plans = {}
+    for model_key in model_keys:
+        config = MODEL_CONFIGS[model_key]
+        existing = load_existing_responses(model_key)
+        jobs, skipped = plan_model_jobs(
+            existing, questions, languages, config["provider"], config["model_id"], samples
+        )
+        plans[model_key] = {
+            "config": config,
+            "jobs": jobs,
+            "skipped": skipped,
+            "usage": mean_usage_tokens(existing),
+        }
+
+    pooled = {}
+    for plan in plans.values():
+        for lang, tokens in plan["usage"].items():
+            pooled.setdefault(lang, []).append(tokens)
+
+    for model_key, plan in plans.items():
+        failures = load_retry_ledger(model_key)
+        pending = cached = retries = 0
+        est_tokens = 0.0
+        for question, lang, question_text, slots in plan["jobs"]:
+            if lang in plan["usage"]:
+                per_request = plan["usage"][lang]
+            elif lang in pooled:
+                per_request = sum(pooled[lang]) / len(pooled[lang])
+            else:
+                per_request = len(SYSTEM_PROMPT + question_text) / CHARS_PER_TOKEN + DEFAULT_COMPLETION_TOKENS
+            for sample_index, key in slots:
+                if cache is not None and cache.contains(key):
+                    cached += 1
+                    continue
+                pending += 1
+                est_tokens += per_request
+                if failures.get((question["id"], lang, sample_index)):
+                    retries += 1
+        plan.update(pending=pending, cached=cached, retries=retries, est_tokens=round(est_tokens))
+    return plans
+
+
+def print_plan(plans: dict):
+    """Print the per-model pending work and its estimated token cost."""
+    print(f"  {'Model':<16} {'Pending':>8} {'Cached':>8} {'Resumed':>8} "
+          f"{'Retries':>8} {'Est. tokens':>12}")
+    print(f"  {'─'*64}")
+    for model_key, plan in plans.items():
+        print(f"  {model_key:<16} {plan['pending']:>8} {plan['cached']:>8} {plan['skipped']:>8} "
+              f"{plan['retries']:>8} {plan['est_tokens']:>12,}")
+    if len(plans) > 1:
+        print(f"  {'─'*64}")
+        print(f"  {'Total':<16} "
+              f"{sum(p['pending'] for p in plans.values()):>8} "
+              f"{sum(p['cached'] for p in plans.values()):>8} "
+              f"{sum(p['skipped'] for p in plans.values()):>8} "
+              f"{sum(p['retries'] for p in plans.values()):>8} "
+              f"{sum(p['est_tokens'] for p in plans.values()):>12,}")
+
+
+def open_cache(use_cache: bool, cache_max_mb: int) -> ResponseCache | None:
+    """Open the shared response cache, or return None when caching is disabled."""
+    if not use_cache:
+        return None
+    return ResponseCache(CACHE_FILE, cache_max_mb * 1024 * 1024)
+
+
+def sort_responses(responses: list[dict]):
+    """Order responses by question, then by canonical language order, then by sample."""
+    lang_order = {lang: i for i, lang in enumerate(LANGUAGES)}
+    responses.sort(key=lambda e: (
+        e["question_id"],
+        lang_order.get(e["language"], len(lang_order)),
+        e.get("sample_index", 0),
+    ))
+
+
+def chat_request_body(model_id: str, question: str) -> dict:
+    """Chat-completions request body, as sent inside a batch input line."""
+    return {
+        "model": model_id,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": question},
+        ],
+        "temperature": TEMPERATURE,
+        "max_tokens": MAX_TOKENS,
+    }
+
+
+def build_batch_requests(model_id: str, jobs: list[tuple]) -> tuple[list[dict], dict]:
+    """
+    Turn pending jobs into Batch API input lines (one per sample) plus the
+    custom_id -> request lookup needed to turn results back into entries.
+    """
+    lines = []
+    requests = {}
+    for question, lang, question_text, pending in jobs:
+        for sample_index, key in pending:
+            custom_id = f"q{question['id']}-{lang}-s{sample_index}"
+            lines.append({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": chat_request_body(model_id, question_text),
+            })
+            requests[custom_id] = {
+                "question_id": question["id"],
+                "category": question["category"],
+                "language": lang,
+                "sample_index": sample_index,
+                "question": question_text,
+                "request_key": key,
+            }
+    return lines, requests
+
+
+def submit_batch(client, model_key: str, model_config: dict, lines: list[dict], requests: dict) -> dict:
+    """Upload the batch input file, create the batch and persist its state."""
+    payload = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+    input_file = client.files.create(
+        file=(f"{model_key}_batch_input.jsonl", payload.encode("utf-8")),
+        purpose="batch",
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata={"model_key": model_key},
+    )
+    state = {
+        "batch_id": batch.id,
+        "input_file_id": input_file.id,
+        "provider": model_config["provider"],
+        "model_id": model_config["model_id"],
+        "submitted_at": datetime.now().isoformat(),
+        "requests": requests,
+    }
+    # Written before polling starts, so an interrupted run resumes this batch
+    write_json_atomic(get_batch_state_path(model_key), state)
+    return state
+
+
+def read_batch_file(client, file_id: str | None) -> list[dict]:
+    """Download a batch output/error file and parse its JSONL lines."""
+    if not file_id:
+        return []
+    text = client.files.content(file_id).read().decode("utf-8")
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def parse_batch_result(line: dict) -> dict:
+    """Convert one Batch API output or error line into a query result."""
+    response = line.get("response") or {}
+    body = response.get("body") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or body.get("error") or {}
+        message = error.get("message") if isinstance(error, dict) else str(error)
+        return {
+            "answer": None,
+            "usage": {},
+            "latency_seconds": None,
+            "error": message or f"Batch request failed with HTTP {response.get('status_code')}",
+        }
+    usage = body.get("usage") or {}
+    choices = body.get("choices") or [{}]
+    return {
+        "answer": (choices[0].get("message") or {}).get("content"),
+        "usage": {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        },
+        # Per-request latency is not observable through the Batch API
+        "latency_seconds": None,
+        "error": None,
+    }
+
+
+def ingest_batch(
+    client,
+    model_key: str,
+    model_config: dict,
+    state: dict,
+    batch,
+    cache: ResponseCache | None,
+    db: ResponseDB | None = None,
+) -> int:
+    """Journal a finished batch's results, compact them and drop the batch state."""
+    results = {}
+    for line in read_batch_file(client, batch.output_file_id) + read_batch_file(client, batch.error_file_id):
+        results[line["custom_id"]] = parse_batch_result(line)
+
+    entries = []
+    for custom_id, request in state["requests"].items():
+        result = results.get(custom_id) or {
+            "answer": None,
+            "usage": {},
+            "latency_seconds": None,
+            "error": f"Batch {batch.status} without a result for this request",
+        }
+        question = {"id": request["question_id"], "category": request["category"]}
+        entries.append(build_entry(
+            question, request["language"], request["question"], result,
+            request["request_key"], request["sample_index"],
+        ))
+
+    journal = ResponseJournal(get_journal_path(model_key))
+    ledger = ResponseJournal(get_ledger_path(model_key))
+    try:
+        record_entries(journal, ledger, cache, entries)
+    finally:
+        journal.close()
+        ledger.close()
+    store_entries(db, model_key, model_config, entries)
+    compact_responses(model_key, model_config)
+    get_batch_state_path(model_key).unlink(missing_ok=True)
+    return sum(1 for entry in entries if entry["error"] is None)
 
 
 def run_queries(
     model_keys: list[str],
     languages: list[str],
     dry_run: bool = False,
+    concurrency: int = 1,
+    use_cache: bool = True,
+    cache_max_mb: int = CACHE_MAX_MB,
+    pool_size: int | None = None,
+    http2: bool = False,
+    samples: int = 1,
+    stream: bool = False,
+    batch: bool = False,
+    poll_interval: float = BATCH_POLL_SECONDS,
+    use_db: bool = False,
 ):
-    """Main query loop with rate limiting and progress tracking."""
+    """Main query entry point: prints the run header and dispatches to an executor."""
     load_dotenv(ROOT_DIR / ".env")
     questions = load_questions()
 
@@ -205,12 +1065,25 @@ def run_queries(
     print(f"  Questions: {len(questions)}")
     print(f"  Languages: {', '.join(languages)}")
     print(f"  Models:    {', '.join(model_keys)}")
-    total = len(questions) * len(languages) * len(model_keys)
+    print(f"  Samples:   {samples} per prompt")
+    if batch:
+        print(f"  Mode:      batch API (poll every {poll_interval:g}s)")
+    else:
+        print(f"  Mode:      {'streaming (TTFT + tokens/sec)' if stream else 'blocking'}")
+    total = len(questions) * len(languages) * len(model_keys) * samples
     print(f"  Total queries: {total}")
+    if use_db or DB_PATH.exists():
+        print(f"  Database:  {DB_PATH}")
     print(f"{'='*60}\n")
 
+    cache = open_cache(use_cache, cache_max_mb)
+    plans = plan_run(questions, model_keys, languages, samples, cache)
+    print_plan(plans)
+
     if dry_run:
-        print("✅ Dry run complete — configuration is valid.")
+        if cache is not None:
+            cache.close()
+        print("\n✅ Dry run complete — configuration is valid.")
         # Validate API keys
         for model_key in model_keys:
             config = MODEL_CONFIGS[model_key]
@@ -221,78 +1094,298 @@ def run_queries(
                 print(f"  ❌ {config['display_name']}: {e}")
         return
 
-    for model_key in model_keys:
-        config = MODEL_CONFIGS[model_key]
+    if use_db:
+        # Create the database on first use and bring in responses it has not seen
+        with ResponseDB(DB_PATH) as db:
+            imported = db.import_exports(RESPONSES_DIR)
+        if imported:
+            print(f"  🗄️  Imported into response database: {', '.join(imported)}\n")
+
+    clients = ClientPool(pool_size or max(concurrency, 1), http2)
+    # One connection for the whole run; None unless the database exists
+    db = open_database()
+    try:
+        if batch:
+            run_queries_batch(plans, clients, cache, poll_interval, db)
+        elif concurrency > 1:
+            asyncio.run(run_queries_async(plans, concurrency, clients, cache, stream, db))
+        else:
+            run_queries_serial(plans, clients, cache, stream, db)
+    finally:
+        clients.close()
+        if db is not None:
+            db.close()
+        if cache is not None:
+            print(f"\n  💾 Cache: {cache.hits} hits, {cache.misses} misses ({CACHE_FILE})")
+            cache.close()
+
+    print(f"\n{'='*60}")
+    print(f"  All queries complete!")
+    print(f"  Results saved to: {RESPONSES_DIR}")
+    print(f"{'='*60}\n")
+
+
+def run_queries_serial(
+    plans: dict,
+    clients: ClientPool,
+    cache: ResponseCache | None = None,
+    stream: bool = False,
+    db: ResponseDB | None = None,
+):
+    """Query one model at a time, one request at a time."""
+    limiters = {}
+    for model_key, plan in plans.items():
+        config = plan["config"]
         provider = config["provider"]
+        jobs = plan["jobs"]
         print(f"\n🤖 Querying: {config['display_name']}")
         print(f"   Provider: {provider} | Model: {config['model_id']}")
 
+        if not jobs:
+            compact_responses(model_key, config)
+            print(f"   ✅ Nothing pending ({plan['skipped']} resumed)")
+            continue
+
         try:
-            client = create_client(provider)
+            client = clients.get(provider)
         except ValueError as e:
             print(f"   ❌ Skipping: {e}")
             continue
 
-        existing = load_existing_responses(model_key)
-        responses = list(existing.values())  # Start with existing
-        rate_limit = RATE_LIMITS.get(provider, 30)
-        delay = 60.0 / rate_limit
-
-        skipped = 0
-        queried = 0
+        journal = ResponseJournal(get_journal_path(model_key))
+        ledger = ResponseJournal(get_ledger_path(model_key))
+        if provider not in limiters:
+            limiters[provider] = create_limiter(provider)
+        limiter = limiters[provider]
+        succeeded = failed = 0
 
-        pbar = tqdm(
-            total=len(questions) * len(languages),
+        pbar = tqdm.tqdm(
+            total=sum(len(pending) for *_, pending in jobs),
             desc=f"   {model_key}",
             unit="query",
         )
 
-        for question in questions:
-            for lang in languages:
-                pbar.update(1)
+        try:
+            for question, lang, question_text, pending in jobs:
+                entries, remaining = take_cached(cache, question, lang, question_text, pending)
+                for group in request_groups(provider, remaining, stream):
+                    result = query_with_limits(
+                        limiter, client, provider, config["model_id"], question_text,
+                        len(group), stream,
+                    )
+                    entries.extend(build_group_entries(question, lang, question_text, result, group))
+                record_entries(journal, ledger, cache, entries)
+                store_entries(db, model_key, config, entries)
+                errors = count_errors(entries)
+                succeeded += len(entries) - errors
+                failed += errors
+                pbar.update(len(entries))
+        finally:
+            pbar.close()
+            journal.close()
+            ledger.close()
+            # Final compaction into the JSON document, also when interrupted
+            compact_responses(model_key, config)
 
-                # Skip if already done (resume support)
-                if (question["id"], lang) in existing:
-                    skipped += 1
-                    continue
+        print(f"   ✅ Done: {succeeded} new, {failed} failed, {plan['skipped']} resumed")
+        print(f"   📁 Saved to: {get_response_path(model_key)}")
 
-                question_text = question.get(lang)
-                if not question_text:
-                    continue
 
-                result = query_model(client, provider, config["model_id"], question_text)
+async def run_queries_async(
+    plans: dict,
+    concurrency: int,
+    clients: ClientPool,
+    cache: ResponseCache | None = None,
+    stream: bool = False,
+    db: ResponseDB | None = None,
+):
+    """
+    Fan out requests across all models, languages and samples at once.
+
+    Each provider gets a semaphore capping in-flight requests at
+    min(concurrency, RATE_LIMITS[provider]) and a shared ProviderLimiter
+    that paces request starts to the provider's RPM and TPM budgets. The
+    SDK clients are synchronous, so calls run on a thread pool sized to
+    the total number of in-flight slots. Samples of one prompt go out as a
+    single n-choice request on NATIVE_N_PROVIDERS and as parallel requests
+    elsewhere.
+    """
+    loop = asyncio.get_running_loop()
+    gates = {}
+    limiters = {}
+    states = {}
+    jobs = []
 
-                entry = {
-                    "question_id": question["id"],
-                    "category": question["category"],
-                    "language": lang,
-                    "question": question_text,
-                    "answer": result["answer"],
-                    "usage": result["usage"],
-                    "latency_seconds": result["latency_seconds"],
-                    "error": result["error"],
-                }
-                responses.append(entry)
-                queried += 1
+    for model_key, plan in plans.items():
+        config = plan["config"]
+        provider = config["provider"]
+        print(f"🤖 Starting: {config['display_name']}")
+
+        if not plan["jobs"]:
+            compact_responses(model_key, config)
+            print(f"   ✅ Nothing pending ({plan['skipped']} resumed)")
+            continue
+
+        try:
+            client = clients.get(provider)
+        except ValueError as e:
+            print(f"   ❌ Skipping: {e}")
+            continue
+
+        if provider not in gates:
+            rate_limit = RATE_LIMITS.get(provider, 30)
+            gates[provider] = asyncio.Semaphore(max(1, min(concurrency, rate_limit)))
+            limiters[provider] = create_limiter(provider)
+
+        states[model_key] = {
+            "config": config,
+            "client": client,
+            "journal": ResponseJournal(get_journal_path(model_key)),
+            "ledger": ResponseJournal(get_ledger_path(model_key)),
+            "succeeded": 0,
+            "failed": 0,
+            "skipped": plan["skipped"],
+        }
+        jobs.extend((model_key, *job) for job in plan["jobs"])
+
+    if not states:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=concurrency * len(gates))
+    pbar = tqdm.tqdm(total=sum(len(job[-1]) for job in jobs), desc="   all models", unit="query")
+
+    async def run_group(state: dict, question_text: str, n: int) -> dict:
+        config = state["config"]
+        provider = config["provider"]
+        limiter = limiters[provider]
+        estimated = limiter.estimate_tokens(SYSTEM_PROMPT + question_text, n)
+        attempt = 0
+
+        async with gates[provider]:
+            while True:
+                await asyncio.sleep(limiter.reserve(estimated))
+                result = await loop.run_in_executor(
+                    executor, query_model, state["client"], provider,
+                    config["model_id"], question_text, n, stream,
+                )
+                if not settle_result(limiter, estimated, result, attempt):
+                    return result
+                attempt += 1
 
-                # Rate limiting
-                time.sleep(delay)
+    async def run_job(model_key: str, question: dict, lang: str, question_text: str, pending: list):
+        state = states[model_key]
+        entries, remaining = take_cached(cache, question, lang, question_text, pending)
+        groups = request_groups(state["config"]["provider"], remaining, stream)
+        results = await asyncio.gather(
+            *(run_group(state, question_text, len(group)) for group in groups)
+        )
+        for group, result in zip(groups, results):
+            entries.extend(build_group_entries(question, lang, question_text, result, group))
 
-                # Save periodically (every 10 queries)
-                if queried % 10 == 0:
-                    save_responses(model_key, config, responses)
+        record_entries(state["journal"], state["ledger"], cache, entries)
+        store_entries(db, model_key, state["config"], entries)
+        errors = count_errors(entries)
+        state["succeeded"] += len(entries) - errors
+        state["failed"] += errors
+        pbar.update(len(entries))
 
+    try:
+        await asyncio.gather(*(run_job(*job) for job in jobs))
+    finally:
         pbar.close()
+        executor.shutdown(wait=False)
 
-        # Final save
-        save_responses(model_key, config, responses)
-        print(f"   ✅ Done: {queried} new, {skipped} resumed")
-        print(f"   📁 Saved to: {get_response_path(model_key)}")
+        # Final compaction, in the same order the serial loop produces
+        for model_key, state in states.items():
+            state["journal"].close()
+            state["ledger"].close()
+            compact_responses(model_key, state["config"])
+            print(f"   ✅ {model_key}: {state['succeeded']} new, {state['failed']} failed, "
+                  f"{state['skipped']} resumed")
+            print(f"   📁 Saved to: {get_response_path(model_key)}")
 
-    print(f"\n{'='*60}")
-    print(f"  All queries complete!")
-    print(f"  Results saved to: {RESPONSES_DIR}")
-    print(f"{'='*60}\n")
+
+def run_queries_batch(
+    plans: dict,
+    clients: ClientPool,
+    cache: ResponseCache | None = None,
+    poll_interval: float = BATCH_POLL_SECONDS,
+    db: ResponseDB | None = None,
+):
+    """
+    Submit each model's pending requests as one provider batch, poll, ingest.
+
+    Cache hits are recorded straight away; the rest become Batch API lines,
+    one per sample. The `<model>_responses.batch.json` state file written on
+    submission lets an interrupted run resume polling the same batch instead
+    of resubmitting it. All batches are submitted before any is polled.
+    """
+    active = {}
+    for model_key, plan in plans.items():
+        config = plan["config"]
+        provider = config["provider"]
+        print(f"\n📦 Batch: {config['display_name']}")
+
+        if provider not in BATCH_PROVIDERS:
+            print(f"   ❌ Skipping: {provider} has no batch API; run without --batch")
+            continue
+        try:
+            client = clients.get(provider)
+        except ValueError as e:
+            print(f"   ❌ Skipping: {e}")
+            continue
+
+        state_path = get_batch_state_path(model_key)
+        if state_path.exists():
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            print(f"   ↻ Resuming batch {state['batch_id']} ({len(state['requests'])} requests)")
+            active[model_key] = (config, client, state)
+            continue
+
+        cached = []
+        uncached_jobs = []
+        for question, lang, question_text, pending in plan["jobs"]:
+            entries, remaining = take_cached(cache, question, lang, question_text, pending)
+            cached.extend(entries)
+            if remaining:
+                uncached_jobs.append((question, lang, question_text, remaining))
+        if cached:
+            journal = ResponseJournal(get_journal_path(model_key))
+            ledger = ResponseJournal(get_ledger_path(model_key))
+            try:
+                record_entries(journal, ledger, cache, cached)
+            finally:
+                journal.close()
+                ledger.close()
+            store_entries(db, model_key, config, cached)
+        compact_responses(model_key, config)
+
+        lines, requests = build_batch_requests(config["model_id"], uncached_jobs)
+        print(f"   {len(lines)} to submit, {len(cached)} from cache, {plan['skipped']} resumed")
+        if not lines:
+            continue
+        state = submit_batch(client, model_key, config, lines, requests)
+        print(f"   📤 Submitted batch {state['batch_id']}")
+        active[model_key] = (config, client, state)
+
+    last_seen = {}
+    while active:
+        for model_key, (config, client, state) in list(active.items()):
+            batch = client.batches.retrieve(state["batch_id"])
+            counts = batch.request_counts
+            progress = (batch.status, counts.completed + counts.failed if counts else 0)
+            if progress != last_seen.get(model_key):
+                last_seen[model_key] = progress
+                print(f"   ⏳ {model_key}: {batch.status} ({progress[1]}/{len(state['requests'])})")
+            if batch.status not in BATCH_TERMINAL_STATUSES:
+                continue
+            succeeded = ingest_batch(client, model_key, config, state, batch, cache, db)
+            print(f"   ✅ {model_key}: {succeeded}/{len(state['requests'])} succeeded")
+            print(f"   📁 Saved to: {get_response_path(model_key)}")
+            del active[model_key]
+        if active:
+            time.sleep(poll_interval)
 
 
 def main():
@@ -308,8 +1401,8 @@ def main():
         "--models",
         nargs="+",
         choices=list(MODEL_CONFIGS.keys()),
-        default=list(MODEL_CONFIGS.keys()),
-        help="Models to query (default: all)",
+        default=[k for k, c in MODEL_CONFIGS.items() if c["provider"] != "mock"],
+        help="Models to query (default: all except mock)",
     )
     parser.add_argument(
         "--languages",
@@ -318,9 +1411,86 @@ def main():
         default=LANGUAGES,
         help="Languages to query (default: all)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Max in-flight requests per provider; >1 enables the async engine (default: 1)",
+    )
+
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=None,
+        help="Keep-alive connections per provider (default: --concurrency)",
+    )
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 for OpenAI-compatible providers (needs the 'h2' package)",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=1,
+        help="Completions per (question, language), stored under sample_index (default: 1)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream replies and record TTFT, inter-token latency and tokens/sec",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=f"Submit pending prompts through the provider Batch API ({', '.join(BATCH_PROVIDERS)})",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=BATCH_POLL_SECONDS,
+        help=f"Seconds between batch status checks (default: {BATCH_POLL_SECONDS})",
+    )
+    parser.add_argument(
+        "--db",
+        action="store_true",
+        help="Keep responses in the SQLite response database (created and filled from the "
+             "JSON files on first use, then kept up to date automatically; JSON is still exported)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always query the API instead of reusing cached identical requests",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=CACHE_MAX_MB,
+        help=f"Size bound of the response cache before LRU eviction (default: {CACHE_MAX_MB})",
+    )
 
     args = parser.parse_args()
-    run_queries(args.models, args.languages, args.dry_run)
+    for option in ("concurrency", "samples", "pool_size"):
+        value = getattr(args, option)
+        if value is not None and value < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1 (got {value})")
+    if args.batch and args.stream:
+        parser.error("--batch and --stream cannot be combined")
+    run_queries(
+        args.models,
+        args.languages,
+        args.dry_run,
+        args.concurrency,
+        use_cache=not args.no_cache,
+        cache_max_mb=args.cache_max_mb,
+        pool_size=args.pool_size,
+        http2=args.http2,
+        samples=args.samples,
+        stream=args.stream,
+        batch=args.batch,
+        poll_interval=args.poll_interval,
+        use_db=args.db,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Provider Rate Limiter
+======================
+Token-bucket rate limiting shared by the serial and async query engines.
+
+Each provider gets one ProviderLimiter holding two buckets:
+- requests per minute (RPM)
+- tokens per minute (TPM), charged with an estimate before the call and
+  corrected with the real `usage` once the call returns
+
+Reservations never block; they return how long the caller should wait,
+so the same limiter works with time.sleep() and asyncio.sleep().
+Rate-limit errors push a shared "blocked until" deadline using the
+provider's retry-after hint (or exponential backoff) plus jitter, so
+concurrent workers back off together instead of producing a 429 storm.
+"""
+
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# Rough chars-per-token ratio used to estimate prompt size before a call
+CHARS_PER_TOKEN = 3.0
+
+# Completion size assumed until the first real usage numbers arrive
+DEFAULT_COMPLETION_TOKENS = 256
+
+# Seconds of budget a bucket may accumulate while idle
+BURST_SECONDS = 10.0
+
+RATE_LIMIT_MARKERS = (
+    "rate limit",
+    "rate_limit",
+    "too many requests",
+    "resource has been exhausted",
+    "resource_exhausted",
+    "quota",
+    "429",
+)
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_RETRY_IN_MESSAGE = re.compile(
+    r"(?:try again|retry) in\s+((?:\d+(?:\.\d+)?(?:ms|h|m|s))+)", re.IGNORECASE
+)
+_RETRY_DELAY_SECONDS = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)")
+
+
+def parse_duration(value: str) -> float | None:
+    """Parse durations like '7.66s', '1m2.5s', '350ms' or a bare number of seconds."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+def _parse_retry_after_header(value: str) -> float | None:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    seconds = parse_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limit_error(exc: Exception) -> tuple[bool, float | None]:
+    """
+    Inspect an SDK exception for rate-limit signals.
+
+    Returns (rate_limited, retry_after_seconds). Looks at the HTTP status,
+    the Retry-After header on the attached response, then the
+    x-ratelimit-reset-* headers (Groq, OpenAI-compatible), and finally
+    retry hints embedded in the message (Groq "try again in 7.66s",
+    Gemini "retry_delay { seconds: 37 }"). Retry-After wins when present:
+    the reset headers say when a whole budget refills, which is often far
+    later than the server needs the client to wait.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status is None:
+        status = getattr(exc, "code", None)  # google.api_core exceptions
+    message = str(exc)
+
+    rate_limited = status == 429 or any(m in message.lower() for m in RATE_LIMIT_MARKERS)
+    if not rate_limited:
+        return False, None
+
+    headers = getattr(response, "headers", None) or {}
+    retry_after = None
+    if headers.get("retry-after"):
+        retry_after = _parse_retry_after_header(headers["retry-after"])
+    if retry_after is None:
+        resets = [
+            _parse_retry_after_header(headers[header])
+            for header in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+            if headers.get(header)
+        ]
+        retry_after = max((reset for reset in resets if reset is not None), default=None)
+
+    if retry_after is None:
+        match = _RETRY_IN_MESSAGE.search(message)
+        if match:
+            retry_after = parse_duration(match.group(1))
+        else:
+            match = _RETRY_DELAY_SECONDS.search(message)
+            if match:
+                retry_after = float(match.group(1))
+
+    return True, retry_after
+
+
+class TokenBucket:
+    """
+    Continuously refilling token bucket.
+
+    reserve() always succeeds and may overdraw the bucket; the returned
+    wait is the time until the debt is repaid, which queues callers in
+    reservation order without holding a lock while they sleep.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` tokens and return seconds to wait before using them."""
+        self._refill(now)
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def adjust(self, delta: float, now: float):
+        """Charge (delta > 0) or refund (delta < 0) tokens after the fact."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - delta)
+
+
+class ProviderLimiter:
+    """Thread-safe RPM + TPM limiter with shared backoff for one provider."""
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float | None = None,
+        base_backoff: float = 2.0,
+        max_backoff: float = 60.0,
+    ):
+        self._lock = threading.Lock()
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._consecutive_limits = 0
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self._completion_tokens = float(DEFAULT_COMPLETION_TOKENS)
+
+    def estimate_tokens(self, prompt: str, choices: int = 1) -> int:
+        """Estimate total tokens for a request from its prompt and recent completions."""
+        return int(len(prompt) / CHARS_PER_TOKEN + choices * self._completion_tokens)
+
+    def reserve(self, estimated_tokens: int = 0) -> float:
+        """Reserve one request and `estimated_tokens`; return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._requests.reserve(1, now)
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(estimated_tokens, now))
+            return max(wait, self._blocked_until - now)
+
+    def record_usage(self, estimated_tokens: int, usage: dict, choices: int = 1):
+        """Reconcile the token estimate with the real usage of a finished call."""
+        total = usage.get("total_tokens") or 0
+        completion = (usage.get("completion_tokens") or 0) / max(choices, 1)
+        with self._lock:
+            self._consecutive_limits = 0
+            if completion:
+                # Exponential moving average keeps estimates close to recent answers
+                self._completion_tokens = 0.8 * self._completion_tokens + 0.2 * completion
+            if self._tokens is not None and total:
+                self._tokens.adjust(total - estimated_tokens, time.monotonic())
+
+    def record_failure(self, estimated_tokens: int):
+        """Refund the token estimate of a call that failed without consuming tokens."""
+        if self._tokens is None:
+            return
+        with self._lock:
+            self._tokens.adjust(-estimated_tokens, time.monotonic())
+
+    def record_rate_limit(self, retry_after: float | None = None) -> float:
+        """Block the provider after a rate-limit error; return the backoff applied."""
+        with self._lock:
+            self._consecutive_limits += 1
+            if retry_after is not None:
+                delay = retry_after + random.uniform(0, 0.1 * retry_after + 0.5)
+            else:
+                ceiling = min(
+                    self._max_backoff,
+                    self._base_backoff * 2 ** (self._consecutive_limits - 1),
+                )
+                delay = random.uniform(ceiling / 2, ceiling)
+            now = time.monotonic()
+            self._blocked_until = max(self._blocked_until, now + delay)
+            return delay
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+===============
+Persistent, size-bounded, content-addressed cache of successful query results.
+
+Entries are keyed by a hash of the full request (provider, model_id,
+system prompt, sampling parameters, question text), so an identical
+request is never paid for twice across runs, model sets or branches,
+while any change to the request misses the cache. Storage is a single
+SQLite file; once it grows past `max_bytes` the least recently used
+entries are evicted.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Fields of a query result worth caching (errors are never cached)
+CACHED_FIELDS = (
+    "answer", "usage", "latency_seconds", "ttft_seconds", "tokens_per_second", "itl_ms",
+)
+
+
+class ResponseCache:
+    """Thread-safe LRU response cache backed by SQLite."""
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (last_access)"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+        self._total_bytes = row[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached result for `key` (marking it recently used), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        result = {k: v for k, v in json.loads(row[0]).items() if v is not None}
+        result["error"] = None
+        result["cache_hit"] = True
+        return result
+
+    def contains(self, key: str) -> bool:
+        """True if `key` is cached; unlike get() this neither counts nor touches it."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM cache WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def put(self, key: str, result: dict):
+        """Store a successful result and evict LRU entries beyond the size bound."""
+        value = json.dumps({f: result.get(f) for f in CACHED_FIELDS}, ensure_ascii=False)
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM cache ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    return
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
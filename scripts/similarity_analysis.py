@@ -7,92 +7,308 @@ using multilingual sentence-transformers.
 
 Uses: paraphrase-multilingual-MiniLM-L12-v2 (supports 50+ languages)
 
+When a prompt was sampled several times, similarity for a language pair is
+the mean over all cross-language sample pairs, with its std alongside.
+
+Answers of all selected models are encoded together: identical strings are
+encoded once, and texts are sorted by token length into batches capped by
+a padded-token budget, so short answers share large batches and long ones
+do not pad out everything else.
+
+Embeddings are cached on disk per encoder and text, so re-runs only
+encode answers that are new or changed.
+
+On CPU-only machines the encoder can run as an ONNX export, optionally
+int8-quantized (see encoders.py). Every plain torch run records its
+scores as the reference; until one has, the committed similarity_scores.csv
+seeds it. Runs on another backend are checked against the reference and
+are not saved if any score moves by more than MAX_DRIFT, the mean by more
+than MAX_MEAN_DRIFT, or a pair crosses the divergence threshold
+(`--no-check` saves them anyway, `--check` also checks torch runs).
+
+Answers longer than the encoder's 128-token window would be truncated to
+their opening sentences. `--chunk` instead splits them on sentence
+boundaries into window-sized segments, encodes every segment in the same
+batched pass, and mean- or max-pools segment vectors per answer;
+`--segment-scores` also writes best-match segment alignment per language
+pair (see chunking.py). Changing those scores is the point, so chunked
+runs never become the reference, and a checked chunked run is compared
+only on pairs whose answers all fit the window.
+
 Usage:
     python scripts/similarity_analysis.py
     python scripts/similarity_analysis.py --models llama3-8b
+    python scripts/similarity_analysis.py --no-cache   # Re-encode everything
+    python scripts/similarity_analysis.py --backend onnx-int8 --threads 4
+    python scripts/similarity_analysis.py --chunk --pooling max --segment-scores
 """
 
-import json
+from __future__ import annotations
+
 import argparse
 import itertools
+import shutil
+import sys
 from pathlib import Path
 
-import numpy as np
-import pandas as pd
-from tqdm import tqdm
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from crosslingual import LANG_NAMES, LANGUAGES, discover_models, iter_records
+from crosslingual.lazy import lazy_import
+from crosslingual.store import write_table
+from chunking import alignment_scores, normalize, pool_segments, segment_texts, token_counter
+from embedding_cache import EmbeddingCache
+from encoders import BACKENDS, load_encoder, load_tokenizer
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+tqdm = lazy_import("tqdm")
 
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
-RESPONSES_DIR = ROOT_DIR / "results" / "responses"
 OUTPUT_CSV = ROOT_DIR / "results" / "similarity_scores.csv"
 INTERESTING_OUT = ROOT_DIR / "results" / "interesting_cases.md"
+SEGMENT_CSV = ROOT_DIR / "results" / "segment_alignment.csv"
+EMBEDDING_CACHE_DIR = ROOT_DIR / "results" / "cache" / "embeddings"
+REFERENCE_CSV = ROOT_DIR / "results" / "cache" / "similarity_reference_torch.csv"
 
-LANGUAGES = ["en", "ru", "zh", "kz"]
-LANG_NAMES = {"en": "English", "ru": "Russian", "zh": "Chinese", "kz": "Kazakh"}
 LANG_PAIRS = list(itertools.combinations(LANGUAGES, 2))
 
 # Multilingual model — supports EN, RU, ZH and partially KZ
 MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 
-
-def load_model():
-    """Load the multilingual sentence-transformer model."""
-    from sentence_transformers import SentenceTransformer
-    print(f"  Loading model: {MODEL_NAME}")
-    print(f"  (First run downloads ~500MB, subsequent runs use cache)")
-    model = SentenceTransformer(MODEL_NAME)
-    return model
-
-
-def compute_cosine_similarity(vec_a: np.ndarray, vec_b: np.ndarray) -> float:
-    """Compute cosine similarity between two vectors."""
-    dot = np.dot(vec_a, vec_b)
-    norm = np.linalg.norm(vec_a) * np.linalg.norm(vec_b)
-    if norm == 0:
-        return 0.0
-    return float(dot / norm)
-
-
-def discover_models() -> list[str]:
-    """Find all available response files."""
-    if not RESPONSES_DIR.exists():
-        return []
-    models = []
-    for path in RESPONSES_DIR.glob("*_responses.json"):
-        model_key = path.stem.replace("_responses", "")
-        models.append(model_key)
-    return sorted(models)
-
-
-def load_responses(model_key: str) -> dict:
-    """Load responses and organize by (question_id, language)."""
-    path = RESPONSES_DIR / f"{model_key}_responses.json"
-    if not path.exists():
-        return {}, {}
-
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
+# The model's input window (max_seq_length), special tokens included
+SEGMENT_TOKENS = 128
+
+# Padded tokens (batch size x longest text) per encoder batch, and a cap on texts
+TOKEN_BUDGET = 8192
+MAX_BATCH_SIZE = 256
+
+# A batch is closed before its padding exceeds this fraction of its real tokens
+MAX_PADDING = 0.1
+
+# Length estimate for encoders that expose no tokenizer
+CHARS_PER_TOKEN = 4
+
+# Scores below this are reported as interesting (divergent) cases
+DIVERGENCE_THRESHOLD = 0.75
+
+# Drift from the torch reference a checked run may show: mean and worst
+# |similarity difference|, and pairs that cross DIVERGENCE_THRESHOLD
+MAX_MEAN_DRIFT = 0.01
+MAX_DRIFT = 0.05
+MAX_THRESHOLD_FLIPS = 0
+
+
+def load_model(backend: str = "torch", threads: int | None = None):
+    """Load the multilingual sentence-transformer model with the given backend."""
+    return load_encoder(MODEL_NAME, backend, threads)
+
+
+def encoder_cache_name(backend: str) -> str:
+    """Embedding cache key: backends produce slightly different vectors."""
+    return MODEL_NAME if backend == "torch" else f"{MODEL_NAME}@{backend}"
+
+
+def token_lengths(model, texts: list[str]) -> np.ndarray:
+    """Tokens per text as the encoder will see them (after truncation)."""
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        return np.array([max(1, len(text) // CHARS_PER_TOKEN) for text in texts])
+    max_length = getattr(model, "max_seq_length", None)
+    input_ids = tokenizer(
+        texts, add_special_tokens=True, truncation=max_length is not None, max_length=max_length,
+    )["input_ids"]
+    return np.array([len(ids) for ids in input_ids])
+
+
+def token_budget_batches(
+    lengths: np.ndarray,
+    token_budget: int = TOKEN_BUDGET,
+    max_batch_size: int = MAX_BATCH_SIZE,
+    max_padding: float = MAX_PADDING,
+) -> list[np.ndarray]:
+    """
+    Split text indices, longest first, into batches whose padded size
+    (count x longest member) stays within `token_budget` and wastes at most
+    `max_padding` of the batch's real tokens on padding.
+    """
+    lengths = np.maximum(np.asarray(lengths), 1)
+    order = np.argsort(-lengths, kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        # Sorted descending, so the first text sets the batch's padded length
+        longest = int(lengths[order[start]])
+        end = start + 1
+        real = longest
+        while end < len(order) and end - start < max_batch_size:
+            padded = (end - start + 1) * longest
+            if padded > token_budget or padded > (1 + max_padding) * (real + lengths[order[end]]):
+                break
+            real += int(lengths[order[end]])
+            end += 1
+        batches.append(order[start:end])
+        start = end
+    return batches
+
+
+def encode_texts(model, texts: list[str]) -> np.ndarray:
+    """Encode texts in length-sorted token-budget batches, returned in input order."""
+    batches = token_budget_batches(token_lengths(model, texts))
+    embeddings = None
+    for batch in tqdm.tqdm(batches, desc="  Encoding", unit="batch"):
+        vectors = model.encode(
+            [texts[i] for i in batch], batch_size=len(batch), show_progress_bar=False,
+        )
+        if embeddings is None:
+            embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+        embeddings[batch] = vectors
+    return embeddings
+
+
+def embedding_tensor(
+    keys: list[tuple], vectors: np.ndarray, groups: list[tuple]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Scatter embeddings keyed by (model, question_id, language, sample_index)
+    into a (group, language, sample, dim) tensor of L2-normalized vectors,
+    one group per (model, question_id), plus a mask of the filled slots.
+    Zero vectors stay zero, so their similarity to anything is 0.
+    """
+    lang_index = {lang: i for i, lang in enumerate(LANGUAGES)}
+    group_index = {group: i for i, group in enumerate(groups)}
+    kept = [i for i, key in enumerate(keys) if key[2] in lang_index]
+    g = np.array([group_index[keys[i][:2]] for i in kept], dtype=np.intp)
+    l = np.array([lang_index[keys[i][2]] for i in kept], dtype=np.intp)
+    s = np.array([keys[i][3] for i in kept], dtype=np.intp)
+
+    samples = int(s.max()) + 1 if len(s) else 1
+    tensor = np.zeros((len(groups), len(LANGUAGES), samples, vectors.shape[1]), dtype=np.float32)
+    mask = np.zeros(tensor.shape[:3], dtype=bool)
+    tensor[g, l, s] = vectors[kept]
+    mask[g, l, s] = True
+
+    norms = np.linalg.norm(tensor, axis=-1, keepdims=True)
+    np.divide(tensor, norms, out=tensor, where=norms > 0)
+    return tensor, mask
+
+
+def pairwise_similarity(unit: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Cosine similarity over every cross-language sample pair, for all groups
+    and language pairs at once. Returns (mean, std, count) arrays of shape
+    (group, pair), pairs ordered like itertools.combinations(LANGUAGES, 2).
+    """
+    a, b = np.triu_indices(unit.shape[1], 1)
+    # (group, pair, sample_a, sample_b) from one batched matrix product
+    sims = np.matmul(unit[:, a], unit[:, b].transpose(0, 1, 3, 2)).astype(np.float64)
+    valid = mask[:, a, :, None] & mask[:, b, None, :]
+
+    count = valid.sum(axis=(2, 3))
+    safe = np.maximum(count, 1)
+    mean = np.where(valid, sims, 0.0).sum(axis=(2, 3)) / safe
+    spread = np.where(valid, sims - mean[:, :, None, None], 0.0)
+    std = np.sqrt((spread ** 2).sum(axis=(2, 3)) / safe)
+    return mean, std, count
+
+
+def compare_scores(df: pd.DataFrame, reference: pd.DataFrame) -> dict:
+    """Agreement of `df` with reference similarity scores on their shared rows."""
+    keys = ["model", "question_id", "lang_pair"]
+    merged = df[keys + ["similarity"]].merge(
+        reference[keys + ["similarity"]], on=keys, suffixes=("", "_ref"),
+    )
+    diff = (merged["similarity"] - merged["similarity_ref"]).abs()
+    flips = (merged["similarity"] < DIVERGENCE_THRESHOLD) != (
+        merged["similarity_ref"] < DIVERGENCE_THRESHOLD
+    )
+    return {
+        "rows": len(merged),
+        "mean_abs_diff": float(diff.mean()) if len(merged) else 0.0,
+        "max_abs_diff": float(diff.max()) if len(merged) else 0.0,
+        "correlation": float(merged["similarity"].corr(merged["similarity_ref"]))
+        if len(merged) > 1 else float("nan"),
+        "threshold_flips": int(flips.sum()),
+    }
+
+
+def drift_problems(stats: dict) -> list[str]:
+    """Ways in which compare_scores() results exceed the accepted drift."""
+    problems = []
+    if not stats["rows"]:
+        problems.append("no rows shared with the reference")
+    if stats["mean_abs_diff"] > MAX_MEAN_DRIFT:
+        problems.append(f"mean |Δ| above {MAX_MEAN_DRIFT}")
+    if stats["max_abs_diff"] > MAX_DRIFT:
+        problems.append(f"max |Δ| above {MAX_DRIFT}")
+    if stats["threshold_flips"] > MAX_THRESHOLD_FLIPS:
+        problems.append(f"{stats['threshold_flips']} pairs crossed {DIVERGENCE_THRESHOLD}")
+    return problems
+
+
+def seed_reference() -> bool:
+    """
+    Start the reference from the committed similarity_scores.csv, so a fresh
+    clone can check another backend without a torch run. False if there is none.
+    """
+    if not OUTPUT_CSV.exists():
+        return False
+    REFERENCE_CSV.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(OUTPUT_CSV, REFERENCE_CSV)
+    return True
+
+
+def update_reference(df: pd.DataFrame):
+    """Record a torch run's scores as the reference, replacing its models' rows."""
+    if REFERENCE_CSV.exists():
+        reference = pd.read_csv(REFERENCE_CSV)
+        df = pd.concat([reference[~reference["model"].isin(df["model"].unique())], df])
+    REFERENCE_CSV.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(REFERENCE_CSV, index=False)
+
+
+def load_answers(model_key: str) -> tuple[dict, dict]:
+    """Load answers and organize by (question_id, language, sample_index)."""
     lookup = {}
     questions = {}
-    for entry in data.get("responses", []):
-        if entry.get("error") or not entry.get("answer"):
+    for record in iter_records(model_key, include_errors=False):
+        if not record.answer:
             continue
-        key = (entry["question_id"], entry["language"])
-        lookup[key] = entry["answer"]
-        questions[entry["question_id"]] = {
-            "category": entry["category"],
-            "question": entry.get("question", ""),
+        lookup[(record.question_id, record.language, record.sample_index)] = record.answer
+        questions[record.question_id] = {
+            "category": record.category,
+            "question": record.question,
         }
 
     return lookup, questions
 
 
-def run_similarity_analysis(model_keys: list[str] | None = None):
-    """Run semantic similarity analysis across language pairs."""
+def first_samples(responses: dict) -> dict[tuple, str]:
+    """Answer of the lowest sample index per (question_id, language)."""
+    first = {}
+    for (qid, lang, _), text in sorted(responses.items(), reverse=True):
+        first[(qid, lang)] = text
+    return first
+
+
+def run_similarity_analysis(
+    model_keys: list[str] | None = None,
+    use_cache: bool = True,
+    cache_dtype: str = "float32",
+    backend: str = "torch",
+    threads: int | None = None,
+    check: bool | None = None,
+    chunk: bool = False,
+    pooling: str = "mean",
+    segment_scores: bool = False,
+):
+    """
+    Run semantic similarity analysis across language pairs. `check` defaults
+    to on for backends other than torch.
+    """
     if not model_keys:
         model_keys = discover_models()
 
@@ -104,79 +320,163 @@ def run_similarity_analysis(model_keys: list[str] | None = None):
     print(f"  Semantic Similarity Analysis")
     print(f"{'='*60}")
     print(f"  Model: {MODEL_NAME}")
+    print(f"  Backend: {backend}" + (f" ({threads} threads)" if threads else ""))
+    if chunk:
+        print(f"  Chunking: {SEGMENT_TOKENS}-token segments, {pooling} pooling")
     print(f"  Language pairs: {len(LANG_PAIRS)}")
     print(f"{'='*60}\n")
 
-    model = load_model()
-    all_results = []
-    all_interesting = []
+    model = None
+
+    def encode(texts: list[str]) -> np.ndarray:
+        # The encoder is only loaded once some text actually needs encoding
+        nonlocal model
+        if model is None:
+            model = load_model(backend, threads)
+        return encode_texts(model, texts)
+
+    cache = (
+        EmbeddingCache(EMBEDDING_CACHE_DIR, encoder_cache_name(backend), cache_dtype)
+        if use_cache else None
+    )
+    answers = {}
+    question_info = {}
+    groups = []
+    keys = []
+    texts = []
 
     for model_key in model_keys:
-        responses, questions = load_responses(model_key)
+        responses, questions = load_answers(model_key)
         if not responses:
             print(f"  ⚠️  No responses for: {model_key}")
             continue
 
-        print(f"\n  🔍 Analyzing: {model_key}")
-
-        # Get all unique question IDs
-        question_ids = sorted(set(qid for (qid, _) in responses.keys()))
-
-        # Encode all responses
-        print(f"  Encoding {len(responses)} responses...")
-        all_texts = []
-        all_keys = []
+        print(f"  🔍 Loaded: {model_key} ({len(responses)} answers)")
+        answers[model_key] = responses
+        for qid in sorted(set(qid for (qid, _, _) in responses.keys())):
+            groups.append((model_key, qid))
+            question_info[(model_key, qid)] = questions.get(qid, {})
         for key, text in responses.items():
-            all_texts.append(text)
-            all_keys.append(key)
-
-        embeddings = model.encode(all_texts, show_progress_bar=True, batch_size=32)
-        embedding_lookup = {key: emb for key, emb in zip(all_keys, embeddings)}
-
-        # Compute pairwise similarity
-        for qid in tqdm(question_ids, desc=f"  Computing similarity"):
-            question_info = questions.get(qid, {})
-
-            for lang_a, lang_b in LANG_PAIRS:
-                key_a = (qid, lang_a)
-                key_b = (qid, lang_b)
-
-                if key_a not in embedding_lookup or key_b not in embedding_lookup:
-                    continue
-
-                sim = compute_cosine_similarity(
-                    embedding_lookup[key_a], embedding_lookup[key_b]
-                )
-
-                result = {
-                    "model": model_key,
-                    "question_id": qid,
-                    "category": question_info.get("category", ""),
-                    "lang_pair": f"{lang_a}-{lang_b}",
-                    "lang_a": lang_a,
-                    "lang_b": lang_b,
-                    "similarity": round(sim, 4),
-                }
-                all_results.append(result)
-
-                # Track interesting cases (low similarity = high divergence)
-                if sim < 0.75:
-                    all_interesting.append({
-                        **result,
-                        "question": question_info.get("question", ""),
-                        "answer_a": responses.get(key_a, "")[:300],
-                        "answer_b": responses.get(key_b, "")[:300],
-                    })
-
-    if not all_results:
+            keys.append((model_key, *key))
+            texts.append(text)
+
+    def embed(items: list[str], label: str) -> np.ndarray:
+        # One encoding pass (only uncached texts reach the encoder)
+        unique_items = len(set(items))
+        if cache is not None:
+            misses = cache.misses
+            vectors = cache.embed(items, encode)
+            print(f"\n  Embedded {len(items)} {label} ({unique_items} distinct): "
+                  f"{cache.misses - misses} encoded, the rest from cache")
+            return vectors
+        if not items:
+            return np.empty((0, 0), dtype=np.float32)
+        print(f"\n  Encoding {len(items)} {label} ({unique_items} distinct)...")
+        distinct = list(dict.fromkeys(items))
+        row = {text: i for i, text in enumerate(distinct)}
+        return encode(distinct)[[row[text] for text in items]]
+
+    segment_vectors = None
+    chunked = set()
+    if chunk and texts:
+        tokenizer = load_tokenizer(MODEL_NAME)
+        if tokenizer is None:
+            print("  ⚠️  transformers not installed; estimating segment lengths from characters")
+        distinct = list(dict.fromkeys(texts))
+        text_row = {text: i for i, text in enumerate(distinct)}
+        segments, offsets = segment_texts(distinct, token_counter(tokenizer), SEGMENT_TOKENS)
+        print(f"\n  ✂️  Chunked {len(distinct)} distinct answers into {len(segments)} segments "
+              f"({int((np.diff(offsets) > 1).sum())} exceeded the {SEGMENT_TOKENS}-token window)")
+        split = {text for text, n in zip(distinct, np.diff(offsets)) if n > 1}
+        chunked = {(model_key, qid, lang) for (model_key, qid, lang, _), text in zip(keys, texts)
+                   if text in split}
+        segment_vectors = normalize(np.asarray(embed(segments, "segments"), dtype=np.float32))
+        pooled = pool_segments(segment_vectors, offsets, pooling)
+        embeddings = pooled[[text_row[text] for text in texts]]
+    else:
+        embeddings = embed(texts, "answers")
+
+    if cache is not None:
+        print(f"\n  💾 Embedding cache: {cache.hits} hits, {cache.misses} encoded "
+              f"({len(cache)} stored in {cache.dir})")
+
+    # All models, questions and language pairs in one batched product
+    if groups:
+        unit, mask = embedding_tensor(keys, np.asarray(embeddings, dtype=np.float32), groups)
+        mean, std, count = pairwise_similarity(unit, mask)
+        group_rows, pair_cols = np.nonzero(count)
+    else:
+        group_rows = pair_cols = np.array([], dtype=np.intp)
+
+    if not len(group_rows):
         print("\n❌ No valid response pairs found for similarity analysis.")
         return
 
+    row_groups = [groups[g] for g in group_rows]
+    row_pairs = [LANG_PAIRS[p] for p in pair_cols]
+    row_means = mean[group_rows, pair_cols]
+    df = pd.DataFrame({
+        "model": [model_key for model_key, _ in row_groups],
+        "question_id": [qid for _, qid in row_groups],
+        "category": [question_info[group].get("category", "") for group in row_groups],
+        "lang_pair": [f"{lang_a}-{lang_b}" for lang_a, lang_b in row_pairs],
+        "lang_a": [lang_a for lang_a, _ in row_pairs],
+        "lang_b": [lang_b for _, lang_b in row_pairs],
+        "similarity": [round(float(sim), 4) for sim in row_means],
+        "similarity_std": [round(float(sd), 4) for sd in std[group_rows, pair_cols]],
+        "n_pairs": count[group_rows, pair_cols],
+    })
+
+    # Track interesting cases (low similarity = high divergence)
+    all_interesting = []
+    first = {model_key: first_samples(responses) for model_key, responses in answers.items()}
+    for row in np.flatnonzero(row_means < DIVERGENCE_THRESHOLD):
+        (model_key, qid), (lang_a, lang_b) = row_groups[row], row_pairs[row]
+        all_interesting.append({
+            **df.iloc[row].to_dict(),
+            "question": question_info[(model_key, qid)].get("question", ""),
+            "answer_a": first[model_key][(qid, lang_a)][:300],
+            "answer_b": first[model_key][(qid, lang_b)][:300],
+        })
+
+    # Chunking changes what is encoded, so only whole-answer torch runs are the reference
+    reference_run = backend == "torch" and not chunk
+    if check is None:
+        check = backend != "torch"
+    if check:
+        if not REFERENCE_CSV.exists():
+            if not seed_reference():
+                print("\n❌ No torch reference scores to check against; run once with "
+                      "--backend torch (or pass --no-check). Existing results kept.")
+                return
+            print(f"\n  🌱 Seeded the torch reference from {OUTPUT_CSV.name}")
+        # Pairs with a chunked answer are meant to differ from the reference
+        whole = [
+            (model_key, qid, lang_a) not in chunked and (model_key, qid, lang_b) not in chunked
+            for (model_key, qid), (lang_a, lang_b) in zip(row_groups, row_pairs)
+        ]
+        stats = compare_scores(df[whole], pd.read_csv(REFERENCE_CSV))
+        skipped = f", {len(df) - sum(whole)} with chunked answers skipped" if chunked else ""
+        print(f"\n  🎯 Accuracy vs torch reference ({stats['rows']} shared rows{skipped}):")
+        print(f"     mean |Δ| {stats['mean_abs_diff']:.4f}, max |Δ| {stats['max_abs_diff']:.4f}, "
+              f"r = {stats['correlation']:.4f}, "
+              f"{stats['threshold_flips']} crossed the {DIVERGENCE_THRESHOLD} threshold")
+        problems = drift_problems(stats)
+        if problems:
+            print(f"\n❌ Results drift from the reference ({'; '.join(problems)}); "
+                  f"existing results kept. Pass --no-check to save them anyway.")
+            return
+
     # Save results
-    df = pd.DataFrame(all_results)
-    OUTPUT_CSV.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(OUTPUT_CSV, index=False)
-    print(f"\n  📁 Similarity scores saved to: {OUTPUT_CSV}")
+    store_path = write_table("similarity_scores", df, OUTPUT_CSV)
+    print(f"\n  📁 Similarity scores saved to: {store_path or OUTPUT_CSV}")
+    if reference_run:
+        update_reference(df)
+
+    if segment_scores and segment_vectors is not None:
+        _write_segment_alignment(
+            df, first, lambda text: segment_vectors[offsets[text_row[text]]:offsets[text_row[text] + 1]]
+        )
 
     # Print summary
     print(f"\n{'='*60}")
@@ -215,6 +515,32 @@ def run_similarity_analysis(model_keys: list[str] | None = None):
     print(f"\n✅ Similarity analysis complete!\n")
 
 
+def _write_segment_alignment(df: pd.DataFrame, first: dict, segments_of):
+    """
+    Best-match segment alignment for every scored (model, question, pair),
+    on the first sample of each language (`first` maps model to first_samples()).
+    """
+    rows = []
+    for row in df[["model", "question_id", "category", "lang_pair", "lang_a", "lang_b"]].itertuples(
+        index=False
+    ):
+        samples = first[row.model]
+        a = segments_of(samples[(row.question_id, row.lang_a)])
+        b = segments_of(samples[(row.question_id, row.lang_b)])
+        alignment, coverage_a, coverage_b = alignment_scores(a, b)
+        rows.append({
+            **row._asdict(),
+            "segments_a": len(a),
+            "segments_b": len(b),
+            "alignment": round(alignment, 4),
+            "coverage_a": round(coverage_a, 4),
+            "coverage_b": round(coverage_b, 4),
+        })
+
+    store_path = write_table("segment_alignment", pd.DataFrame(rows), SEGMENT_CSV)
+    print(f"  📁 Segment alignment saved to: {store_path or SEGMENT_CSV}")
+
+
 def _write_interesting_cases(cases: list[dict], full_df: pd.DataFrame):
     """Write the interesting divergent cases to markdown."""
     # Sort by similarity (most divergent first)
@@ -293,8 +619,55 @@ def main():
         "--models", nargs="+", default=None,
         help="Model keys to analyze (default: all available)",
     )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Encode every response instead of reusing cached embeddings",
+    )
+    parser.add_argument(
+        "--cache-dtype", choices=["float32", "float16"], default="float32",
+        help="Precision of cached embeddings; float16 halves the cache size (default: float32)",
+    )
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default="torch",
+        help="Encoder runtime: torch, onnx, or int8-quantized onnx (default: torch)",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=None,
+        help="CPU threads for the encoder (default: runtime default)",
+    )
+    check = parser.add_mutually_exclusive_group()
+    check.add_argument(
+        "--check", action="store_true", default=None,
+        help="Check against the torch reference even on a torch run",
+    )
+    check.add_argument(
+        "--no-check", dest="check", action="store_false",
+        help="Save results without checking them against the torch reference",
+    )
+    parser.add_argument(
+        "--chunk", action="store_true",
+        help="Split answers longer than the encoder window into sentence segments",
+    )
+    parser.add_argument(
+        "--pooling", choices=["mean", "max"], default="mean",
+        help="How segment vectors combine into one per answer with --chunk (default: mean)",
+    )
+    parser.add_argument(
+        "--segment-scores", action="store_true",
+        help="Also write segment-level alignment per language pair (implies --chunk)",
+    )
     args = parser.parse_args()
-    run_similarity_analysis(args.models)
+    run_similarity_analysis(
+        args.models,
+        use_cache=not args.no_cache,
+        cache_dtype=args.cache_dtype,
+        backend=args.backend,
+        threads=args.threads,
+        check=args.check,
+        chunk=args.chunk or args.segment_scores,
+        pooling=args.pooling,
+        segment_scores=args.segment_scores,
+    )
 
 
 if __name__ == "__main__":
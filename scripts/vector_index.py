@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Vector Index
+=============
+Persistent nearest-neighbour index over response embeddings.
+
+Vectors are stored L2-normalized, so inner product is cosine similarity.
+Small corpora are searched exactly with one matrix product. Above
+EXACT_MAX_VECTORS the index becomes an inverted file (IVF): vectors are
+clustered with spherical k-means, stored grouped by cluster, and a query
+only scores the members of its `nprobe` closest clusters — about
+nprobe / nlist of the corpus instead of all of it.
+
+On disk (one directory per encoder):
+- vectors.npy   (n, dim) float32 unit vectors, grouped by cluster for IVF
+- keys.json     (model, question_id, language, sample_index) per row
+- centroids.npy, offsets.npy   IVF clusters and each cluster's row range
+- meta.json     encoder, size, layout and the fingerprint of the inputs
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import shutil
+from pathlib import Path
+
+from crosslingual.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Up to this many vectors a brute-force scan is fast enough and exact
+EXACT_MAX_VECTORS = 20_000
+
+# IVF shape: ~CLUSTER_FACTOR * sqrt(n) clusters, NPROBE of them scanned per query
+CLUSTER_FACTOR = 2
+NPROBE = 12
+
+# k-means runs on a sample of this many points per cluster
+KMEANS_SAMPLE_PER_CLUSTER = 64
+KMEANS_ITERATIONS = 10
+
+# Queries scored per matrix product in batched exact search
+QUERY_CHUNK = 1024
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores along the last axis, best first."""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+    part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def spherical_kmeans(
+    vectors: np.ndarray, clusters: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0
+) -> np.ndarray:
+    """Unit centroids of `clusters` groups, trained on a sample of `vectors`."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), clusters * KMEANS_SAMPLE_PER_CLUSTER)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[rng.choice(sample_size, clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = (sample @ centroids.T).argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty clusters on random sample points
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Closest centroid per vector, computed in chunks to bound memory."""
+    return np.concatenate([
+        (vectors[start:start + chunk] @ centroids.T).argmax(axis=1)
+        for start in range(0, len(vectors), chunk)
+    ]) if len(vectors) else np.empty(0, dtype=np.intp)
+
+
+class VectorIndex:
+    """Cosine-similarity index over keyed vectors; exact or IVF."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        keys: list[tuple],
+        centroids: np.ndarray | None = None,
+        offsets: np.ndarray | None = None,
+        nprobe: int = NPROBE,
+        meta: dict | None = None,
+    ):
+        self.vectors = vectors
+        self.keys = keys
+        self.centroids = centroids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.meta = meta or {}
+        self._rows = {key: row for row, key in enumerate(keys)}
+
+    @property
+    def kind(self) -> str:
+        return "exact" if self.centroids is None else "ivf"
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def build(
+        cls, vectors: np.ndarray, keys: list[tuple], exact_max: int = EXACT_MAX_VECTORS, **kwargs
+    ) -> "VectorIndex":
+        """Index `vectors` (one row per key); clusters them above `exact_max`."""
+        vectors = normalize(vectors)
+        keys = [tuple(key) for key in keys]
+        if len(vectors) <= exact_max:
+            return cls(vectors, keys, **kwargs)
+
+        clusters = max(1, int(CLUSTER_FACTOR * math.sqrt(len(vectors))))
+        centroids = spherical_kmeans(vectors, clusters)
+        assignment = assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.searchsorted(assignment[order], np.arange(clusters + 1))
+        return cls(
+            np.ascontiguousarray(vectors[order]), [keys[i] for i in order],
+            centroids, offsets, **kwargs,
+        )
+
+    def row(self, key: tuple) -> int | None:
+        return self._rows.get(tuple(key))
+
+    def search(self, query: np.ndarray, k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The k most similar rows to one query vector (dim,) or to each of a
+        batch (n, dim). Returns (scores, rows), best first; rows index
+        `self.keys`. IVF results may hold fewer than k rows.
+        """
+        query = normalize(query)
+        if query.ndim == 2:
+            if self.centroids is None:
+                return self._search_exact_batch(query, k)
+            found = [self._search_ivf(q, k) for q in query]
+            width = max((len(rows) for _, rows in found), default=0)
+            scores = np.full((len(query), width), -np.inf, dtype=np.float32)
+            rows = np.full((len(query), width), -1, dtype=np.intp)
+            for i, (s, r) in enumerate(found):
+                scores[i, :len(s)], rows[i, :len(r)] = s, r
+            return scores, rows
+        if self.centroids is None:
+            scores = self.vectors @ query
+            rows = _top_k(scores, k)
+            return scores[rows], rows
+        return self._search_ivf(query, k)
+
+    def _search_exact_batch(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        scores, rows = [], []
+        for start in range(0, len(queries), QUERY_CHUNK):
+            sims = queries[start:start + QUERY_CHUNK] @ self.vectors.T
+            top = _top_k(sims, k)
+            scores.append(np.take_along_axis(sims, top, axis=1))
+            rows.append(top)
+        if not rows:
+            return np.empty((0, 0), dtype=np.float32), np.empty((0, 0), dtype=np.intp)
+        return np.concatenate(scores), np.concatenate(rows)
+
+    def _search_ivf(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        probes = _top_k(self.centroids @ query, self.nprobe)
+        ranges = [(self.offsets[c], self.offsets[c + 1]) for c in probes]
+        scores = np.concatenate([self.vectors[start:end] @ query for start, end in ranges])
+        rows = np.concatenate([np.arange(start, end) for start, end in ranges])
+        top = _top_k(scores, k)
+        return scores[top], rows[top]
+
+    def save(self, path: Path):
+        """Write the index to directory `path`, replacing any previous one."""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        np.save(tmp_path / "vectors.npy", self.vectors)
+        if self.centroids is not None:
+            np.save(tmp_path / "centroids.npy", self.centroids)
+            np.save(tmp_path / "offsets.npy", self.offsets)
+        with open(tmp_path / "keys.json", "w", encoding="utf-8") as f:
+            json.dump([list(key) for key in self.keys], f, ensure_ascii=False)
+        meta = {**self.meta, "count": len(self), "kind": self.kind, "nprobe": self.nprobe}
+        if len(self):
+            meta["dim"] = int(self.vectors.shape[1])
+        with open(tmp_path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+        # Swap directories so readers never see a half-written index
+        old_path = path.with_name(path.name + ".old")
+        if path.exists():
+            path.rename(old_path)
+        tmp_path.rename(path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: Path) -> "VectorIndex | None":
+        """Read an index saved with save(); None if there is none at `path`."""
+        path = Path(path)
+        if not (path / "meta.json").exists():
+            return None
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(path / "keys.json", "r", encoding="utf-8") as f:
+            keys = [tuple(key) for key in json.load(f)]
+        centroids = offsets = None
+        if meta.get("kind") == "ivf":
+            centroids = np.load(path / "centroids.npy")
+            offsets = np.load(path / "offsets.npy")
+        return cls(
+            np.load(path / "vectors.npy"), keys, centroids, offsets,
+            nprobe=meta.get("nprobe", NPROBE), meta=meta,
+        )
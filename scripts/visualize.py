@@ -16,17 +16,25 @@ Usage:
     python scripts/visualize.py --models llama3-8b
 """
 
+from __future__ import annotations
+
 import argparse
+import os
+import sys
 from pathlib import Path
 
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib
-import seaborn as sns
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from crosslingual import LANG_NAMES, LANGUAGES
+from crosslingual.lazy import lazy_import
+from crosslingual.store import read_table
+
+# Use non-interactive backend for server environments (read when pyplot loads)
+os.environ["MPLBACKEND"] = "Agg"
 
-# Use non-interactive backend for server environments
-matplotlib.use("Agg")
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
 
 # ---------------------------------------------------------------------------
 # Paths
@@ -38,8 +46,6 @@ FIGURES_DIR = RESULTS_DIR / "figures"
 ANALYSIS_CSV = RESULTS_DIR / "analysis_summary.csv"
 SIMILARITY_CSV = RESULTS_DIR / "similarity_scores.csv"
 
-LANGUAGES = ["en", "ru", "zh", "kz"]
-LANG_NAMES = {"en": "English", "ru": "Russian", "zh": "Chinese", "kz": "Kazakh"}
 
 # Research paper color palette
 COLORS = {
@@ -84,10 +90,10 @@ def plot_similarity_heatmap(sim_df: pd.DataFrame, model_key: str):
     )
 
     model_sim = sim_df[sim_df["model"] == model_key]
-    for _, row in model_sim.groupby("lang_pair")["similarity"].mean().items():
+    for _, row in model_sim.groupby("lang_pair", observed=True)["similarity"].mean().items():
         pass
 
-    for pair, sim in model_sim.groupby("lang_pair")["similarity"].mean().items():
+    for pair, sim in model_sim.groupby("lang_pair", observed=True)["similarity"].mean().items():
         lang_a, lang_b = pair.split("-")
         name_a, name_b = LANG_NAMES[lang_a], LANG_NAMES[lang_b]
         matrix.loc[name_a, name_b] = sim
@@ -203,7 +209,7 @@ def plot_confidence_analysis(analysis_df: pd.DataFrame, model_key: str):
     axes[0].legend()
 
     # Disclaimer count by language
-    disc_data = model_df.groupby("language")["num_disclaimers"].mean()
+    disc_data = model_df.groupby("language", observed=True)["num_disclaimers"].mean()
     lang_labels = [LANG_NAMES[l] for l in LANGUAGES if l in disc_data.index]
     disc_values = [disc_data[l] for l in LANGUAGES if l in disc_data.index]
     color_list = [COLORS[l] for l in LANGUAGES if l in disc_data.index]
@@ -299,7 +305,7 @@ def plot_cross_model_comparison(analysis_df: pd.DataFrame, sim_df: pd.DataFrame)
 
     # Average similarity per model
     if not sim_df.empty:
-        model_sims = sim_df.groupby("model")["similarity"].mean().reindex(models)
+        model_sims = sim_df.groupby("model", observed=True)["similarity"].mean().reindex(models)
         bars = axes[1].bar(models, model_sims.values,
                           color=sns.color_palette("husl", len(models)), alpha=0.8)
         axes[1].set_ylabel("Avg Cosine Similarity")
@@ -332,19 +338,18 @@ def run_visualization(model_keys: list[str] | None = None):
     print(f"{'='*60}\n")
 
     # Load data
-    analysis_df = None
-    sim_df = None
-
-    if ANALYSIS_CSV.exists():
-        analysis_df = pd.read_csv(ANALYSIS_CSV)
+    analysis_df = read_table("analysis_summary", ANALYSIS_CSV)
+    if not analysis_df.empty:
         print(f"  Loaded analysis: {len(analysis_df)} rows")
     else:
+        analysis_df = None
         print(f"  ⚠️  No analysis data found. Run analyze_responses.py first.")
 
-    if SIMILARITY_CSV.exists():
-        sim_df = pd.read_csv(SIMILARITY_CSV)
+    sim_df = read_table("similarity_scores", SIMILARITY_CSV)
+    if not sim_df.empty:
         print(f"  Loaded similarity: {len(sim_df)} rows")
     else:
+        sim_df = None
         print(f"  ⚠️  No similarity data found. Run similarity_analysis.py first.")
 
     if analysis_df is None and sim_df is None:
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import query_llms
+from crosslingual import database, loader
+from crosslingual.journal import ResponseJournal
+
+
+@pytest.fixture
+def responses_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_llms, "RESPONSES_DIR", tmp_path)
+    monkeypatch.setattr(loader, "RESPONSES_DIR", tmp_path)
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "responses.sqlite")
+    return tmp_path
+
+
+def entry(question_id: int, error: str | None = None) -> dict:
+    return {
+        "question_id": question_id, "category": "factual", "language": "en",
+        "sample_index": 0, "question": f"Q{question_id}",
+        "answer": "" if error else f"A{question_id}",
+        "usage": {}, "latency_seconds": 0.1, "error": error,
+    }
+
+
+def test_compaction_moves_old_errors_without_a_journal(responses_dir):
+    config = query_llms.MODEL_CONFIGS["mock"]
+    query_llms.save_responses("mock", config, [entry(1), entry(2, error="HTTP 500")])
+    assert not query_llms.get_journal_path("mock").exists()
+
+    assert query_llms.compact_responses("mock", config) == 1
+
+    with open(query_llms.get_response_path("mock"), encoding="utf-8") as f:
+        saved = json.load(f)["responses"]
+    assert [e["question_id"] for e in saved] == [1]
+    ledger = ResponseJournal(query_llms.get_ledger_path("mock")).replay()
+    assert [(e["question_id"], e["error"]) for e in ledger] == [(2, "HTTP 500")]
+
+
+def test_compaction_leaves_a_clean_file_alone(responses_dir):
+    config = query_llms.MODEL_CONFIGS["mock"]
+    query_llms.save_responses("mock", config, [entry(1)])
+    path = query_llms.get_response_path("mock")
+    mtime_ns = path.stat().st_mtime_ns
+
+    assert query_llms.compact_responses("mock", config) == 0
+    assert path.stat().st_mtime_ns == mtime_ns
+    assert not query_llms.get_ledger_path("mock").exists()
@@ -0,0 +1,32 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+def encode(texts: list[str]) -> np.ndarray:
+    return np.arange(len(texts) * 4, dtype=np.float32).reshape(len(texts), 4) + 1
+
+
+def test_only_missing_texts_are_encoded(tmp_path):
+    cache = EmbeddingCache(tmp_path, "encoder")
+    cache.embed(["a", "b"], encode)
+
+    reopened = EmbeddingCache(tmp_path, "encoder")
+    vectors = reopened.embed(["b", "c", "b"], encode)
+    assert (reopened.hits, reopened.misses) == (2, 1)
+    assert vectors.shape == (3, 4)
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+
+
+def test_open_in_stored_dtype_keeps_cache(tmp_path):
+    EmbeddingCache(tmp_path, "encoder", "float16").embed(["a", "b"], encode)
+
+    reader = EmbeddingCache(tmp_path, "encoder", dtype=None)
+    assert reader.dtype == np.float16
+    assert len(reader) == 2
+    reader.embed(["a", "c"], encode)
+    assert len(EmbeddingCache(tmp_path, "encoder", "float16")) == 3
+
+
+def test_new_cache_without_dtype_is_float32(tmp_path):
+    assert EmbeddingCache(tmp_path, "encoder", dtype=None).dtype == np.float32
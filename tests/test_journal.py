@@ -0,0 +1,41 @@
+import json
+
+from crosslingual.journal import ResponseJournal
+
+
+def test_replay_ignores_torn_tail(tmp_path):
+    path = tmp_path / "model.jsonl"
+    journal = ResponseJournal(path)
+    journal.append({"a": 1})
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"a": 2')
+
+    assert ResponseJournal(path).replay() == [{"a": 1}]
+
+
+def test_append_after_torn_tail_keeps_new_entries(tmp_path):
+    path = tmp_path / "model.jsonl"
+    journal = ResponseJournal(path)
+    journal.append({"a": 1})
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"a": 2')
+
+    journal = ResponseJournal(path)
+    journal.append({"a": 3})
+    journal.append({"a": 4})
+    journal.close()
+
+    assert journal.replay() == [{"a": 1}, {"a": 3}, {"a": 4}]
+
+
+def test_append_after_torn_only_line(tmp_path):
+    path = tmp_path / "model.jsonl"
+    path.write_text('{"a": ', encoding="utf-8")
+
+    journal = ResponseJournal(path)
+    journal.append({"a": 1})
+    journal.close()
+
+    assert path.read_text(encoding="utf-8") == json.dumps({"a": 1}) + "\n"
@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+import analyze_responses
+from analyze_responses import ASSERTIVE_MARKERS, DISCLAIMER_PATTERNS, scan_markers
+from crosslingual import discover_models, iter_records
+
+
+def baseline_counts(text: str, language: str) -> tuple[int, int]:
+    """Marker counts as computed before the patterns were fused: one findall each."""
+    text = text.lower()
+    disclaimers = sum(
+        len(re.findall(pattern, text))
+        for pattern in DISCLAIMER_PATTERNS.get(language, DISCLAIMER_PATTERNS["en"])
+    )
+    assertive = sum(
+        len(re.findall(pattern, text))
+        for pattern in ASSERTIVE_MARKERS.get(language, ASSERTIVE_MARKERS["en"])
+    )
+    return disclaimers, assertive
+
+
+@pytest.mark.parametrize("model_key", discover_models())
+def test_fused_scan_matches_baseline_on_stored_responses(model_key):
+    for record in iter_records(model_key, include_errors=False):
+        found = scan_markers(record.answer, record.language)
+        expected = baseline_counts(record.answer, record.language)
+        assert (found["disclaimers"], found["assertive"]) == expected, (
+            model_key, record.question_id, record.language,
+        )
+
+
+@pytest.mark.parametrize("language, text", [
+    ("en", "Clearly, it is important to note that in my opinion the answer is yes. "
+           "On the other hand, some people think it depends on context. Definitely."),
+    ("ru", "Конечно, важно отметить, что с одной стороны да, однако с другой стороны нет."),
+    ("zh", "当然，需要注意的是这取决于情况。然而，确实有些人认为是的。"),
+    ("kz", "Әрине, бұл күрделі мәселе, алайда жауап анық: иә."),
+    ("fr", "Clearly the answer is yes."),
+])
+def test_fused_hits_match_per_pattern_counts(language, text):
+    hits = scan_markers(text, language)["hits"]
+    for table in (DISCLAIMER_PATTERNS, ASSERTIVE_MARKERS):
+        for pattern in table.get(language, table["en"]):
+            assert hits.get(pattern, 0) == len(re.findall(pattern, text.lower())), pattern
+
+
+def test_overlapping_markers_count_once():
+    # "no" inside a disclaimer is not also an assertive marker
+    text = "There is no single answer."
+    assert baseline_counts(text, "en") == (1, 1)
+    found = scan_markers(text, "en")
+    assert (found["disclaimers"], found["assertive"]) == (1, 0)
+
+
+def test_wrappers_agree_with_scan():
+    text = "Certainly. However, there are exceptions; this is nuanced."
+    found = scan_markers(text, "en")
+    assert analyze_responses.count_disclaimers(text, "en") == found["disclaimers"]
+    assert analyze_responses.count_assertiveness(text, "en") == found["assertive"]
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from rate_limiter import parse_rate_limit_error
+
+
+class RateLimited(Exception):
+    def __init__(self, headers: dict, message: str = "Error code: 429 - rate limit reached"):
+        super().__init__(message)
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+def test_retry_after_wins_over_reset_headers():
+    exc = RateLimited({
+        "retry-after": "2",
+        "x-ratelimit-reset-requests": "1m30s",
+        "x-ratelimit-reset-tokens": "7.5s",
+    })
+    assert parse_rate_limit_error(exc) == (True, 2.0)
+
+
+def test_reset_headers_are_the_fallback():
+    exc = RateLimited({"x-ratelimit-reset-requests": "350ms", "x-ratelimit-reset-tokens": "7.5s"})
+    assert parse_rate_limit_error(exc) == (True, 7.5)
+
+
+def test_unparseable_retry_after_falls_back_to_reset_headers():
+    exc = RateLimited({"retry-after": "soon", "x-ratelimit-reset-tokens": "4s"})
+    assert parse_rate_limit_error(exc) == (True, 4.0)
+
+
+def test_message_hint_without_headers():
+    exc = RateLimited({}, "Rate limit reached. Please try again in 1m2.5s.")
+    assert parse_rate_limit_error(exc) == (True, 62.5)
+
+
+def test_other_errors_are_not_rate_limits():
+    assert parse_rate_limit_error(ValueError("bad request")) == (False, None)
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from crosslingual import reader
+from crosslingual.loader import RESPONSES_DIR
+
+RESPONSE_FILES = sorted(RESPONSES_DIR.glob("*_responses.json"))
+
+
+def load(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("path", RESPONSE_FILES, ids=lambda path: path.stem)
+def test_stored_files_match_json_load(path):
+    document = load(path)
+
+    assert list(reader.iter_responses(path)) == document["responses"]
+    assert reader.read_header(path) == {k: v for k, v in document.items() if k != "responses"}
+
+
+@pytest.mark.parametrize("path", RESPONSE_FILES[:1], ids=lambda path: path.stem)
+def test_filters_match_json_load(path):
+    document = load(path)
+    expected = [
+        entry for entry in document["responses"]
+        if entry["language"] in ("ru", "kz") and entry["question_id"] <= 10 and not entry.get("error")
+    ]
+
+    found = reader.iter_responses(
+        path, question_ids=range(1, 11), languages=["ru", "kz"], include_errors=False,
+    )
+    assert list(found) == expected
+
+
+def test_small_chunks_split_tokens(tmp_path, monkeypatch):
+    # Tiny refills cut numbers, escapes and multi-byte text across chunk edges
+    monkeypatch.setattr(reader, "CHUNK_SIZE", 3)
+    document = {
+        "model": "Test \"quoted\" model",
+        "total_queries": 3,
+        "temperature": -1.25e-3,
+        "responses": [
+            {"question_id": 1, "language": "zh", "answer": "哈萨克斯坦的首都是阿斯塔纳。", "error": None},
+            {"question_id": 2, "language": "kz", "answer": "Қазақстан\n\t\\ é", "usage": {}},
+            {"question_id": 12345, "language": "en", "answer": "", "error": "HTTP 500"},
+        ],
+    }
+    path = tmp_path / "test_responses.json"
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    assert list(reader.iter_responses(path)) == document["responses"]
+    assert reader.read_header(path) == {k: v for k, v in document.items() if k != "responses"}
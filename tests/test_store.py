@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from crosslingual import store
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_DIR", tmp_path / "store")
+    return tmp_path
+
+
+def test_round_trip_by_model(store_dir):
+    df = pd.DataFrame({
+        "model": ["a", "a", "b"], "question_id": [1, 2, 1],
+        "language": ["en", "ru", "en"], "score": [0.5, 0.25, 1.0],
+    })
+    store.write_table("scores", df, store_dir / "scores.csv")
+
+    loaded = store.read_table("scores", models=["a"], columns=["question_id", "score"])
+    assert loaded.sort_values("question_id")["score"].tolist() == [0.5, 0.25]
+
+
+def test_empty_table_replaces_earlier_rows(store_dir):
+    csv_path = store_dir / "scores.csv"
+    store.write_table("scores", pd.DataFrame({"model": ["a"], "score": [0.5]}), csv_path)
+
+    assert store.write_table("scores", pd.DataFrame(columns=["model", "score"]), csv_path) is None
+    assert not store.table_path("scores").exists()
+    assert csv_path.read_text(encoding="utf-8").strip() == "model,score"
+    assert store.read_table("scores", csv_path).empty
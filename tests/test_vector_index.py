@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from vector_index import VectorIndex
+
+
+def clustered(n: int = 4000, dim: int = 32, topics: int = 40, seed: int = 0) -> np.ndarray:
+    """Overlapping groups of points, like answers grouped by question."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    return centers[rng.integers(topics, size=n)] + rng.normal(size=(n, dim))
+
+
+def recall(found: list[list], expected: list[list]) -> float:
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)])
+
+
+@pytest.fixture(scope="module")
+def data():
+    vectors = clustered()
+    keys = [("model", i, "en", 0) for i in range(len(vectors))]
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), 200, replace=False)] + 0.3 * rng.normal(size=(200, 32))
+    exact = VectorIndex.build(vectors, keys)
+    ivf = VectorIndex.build(vectors, keys, exact_max=500)
+    return exact, ivf, queries
+
+
+def neighbour_keys(index: VectorIndex, queries: np.ndarray, k: int) -> list[list]:
+    _, rows = index.search(queries, k)
+    return [[index.keys[r] for r in row if r >= 0] for row in rows]
+
+
+def test_layouts(data):
+    exact, ivf, _ = data
+    assert exact.kind == "exact"
+    assert ivf.kind == "ivf"
+    assert sorted(ivf.keys) == sorted(exact.keys)
+
+
+def test_ivf_recall_against_exact(data):
+    exact, ivf, queries = data
+    expected = neighbour_keys(exact, queries, 10)
+    assert recall(neighbour_keys(ivf, queries, 10), expected) >= 0.95
+
+
+def test_ivf_probing_every_cluster_is_exact(data):
+    exact, ivf, queries = data
+    full = VectorIndex(ivf.vectors, ivf.keys, ivf.centroids, ivf.offsets, nprobe=len(ivf.centroids))
+    assert recall(neighbour_keys(full, queries, 10), neighbour_keys(exact, queries, 10)) == 1.0
+
+
+def test_batch_search_matches_single_queries(data):
+    exact, ivf, queries = data
+    for index in (exact, ivf):
+        scores, rows = index.search(queries[:5], 5)
+        for query, batch_scores, batch_rows in zip(queries[:5], scores, rows):
+            single_scores, single_rows = index.search(query, 5)
+            assert list(batch_rows) == list(single_rows)
+            np.testing.assert_allclose(batch_scores, single_scores, rtol=1e-5)
+
+
+def test_save_and_load_round_trip(data, tmp_path):
+    _, ivf, queries = data
+    ivf.save(tmp_path / "index")
+    loaded = VectorIndex.load(tmp_path / "index")
+
+    assert loaded.kind == "ivf"
+    assert loaded.keys == ivf.keys
+    assert neighbour_keys(loaded, queries, 10) == neighbour_keys(ivf, queries, 10)
+    assert VectorIndex.load(tmp_path / "missing") is None